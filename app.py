@@ -3,25 +3,55 @@
 Gradio web application for the LLM-based GitHub project evaluator.
 """
 
+import asyncio
+import atexit
+import csv
+import functools
 import os
 import tempfile
+import traceback
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from dotenv import load_dotenv
-import gradio as gr
 
-# Load environment variables from .env file
-load_dotenv()
+# Removes cloned repositories in the background, off the request path
+_CLEANUP_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix='cleanup')
+atexit.register(_CLEANUP_POOL.shutdown, wait=True)
 
-from evaluator import ProjectEvaluator
-from file_parser import FileParser
-from git_handler import GitHandler
 
+@functools.lru_cache(maxsize=4)
+def _get_evaluator(api_key: str, model: str = "gpt-4o"):
+    """Return a shared evaluator for an API key and model."""
+    from evaluator import ProjectEvaluator
+    return ProjectEvaluator(model=model, api_key=api_key)
 
-def evaluate_project(
+
+@functools.lru_cache(maxsize=None)
+def _get_file_parser():
+    """Return the shared (stateless) file parser."""
+    from file_parser import FileParser
+    return FileParser()
+
+
+def _cleanup(git_handler):
+    """Remove the temporary files of a repository, ignoring failures."""
+    try:
+        git_handler.cleanup()
+    except Exception:
+        pass
+
+
+async def _run_in_thread(func, *args):
+    """Run a blocking function in a worker thread without blocking the event loop."""
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(None, functools.partial(func, *args))
+
+
+async def evaluate_project(
     git_url: str,
     api_key: str,
     description_file,
-    description_text: str
+    description_text: str,
+    model: str = "gpt-4o"
 ):
     """
     Evaluate a GitHub project against a project description.
@@ -29,51 +59,63 @@ def evaluate_project(
     Args:
         git_url: GitHub repository URL
         api_key: OpenAI API key
-        description_file: Uploaded file object
+        description_file: Uploaded file content (bytes)
         description_text: Text description input
+        model: LLM model to use (default: gpt-4o)
         
-    Returns:
-        Markdown string with evaluation results
+    Yields:
+        Markdown strings with the progress, then the evaluation results
     """
+    # Imported on first use to keep the application startup fast
+    from git_handler import GitHandler
+    
     try:
         # Validate inputs
         if not git_url or not git_url.strip():
-            return "❌ Error: GitHub URL is required"
+            yield "❌ Error: GitHub URL is required"
+            return
         
         api_key = api_key.strip() if api_key else os.getenv('OPENAI_API_KEY')
         if not api_key:
-            return "❌ Error: OpenAI API key is required"
+            yield "❌ Error: OpenAI API key is required"
+            return
         
         # Handle description: either uploaded file or text input
         description = None
-        temp_file_path = None
         
         if description_file is not None:
-            # Save uploaded file temporarily
-            temp_file_path = description_file.name
-            
-            # Parse the file
-            parser = FileParser()
-            description = parser.parse(temp_file_path)
+            # Parse the uploaded content in memory, below
+            parser = _get_file_parser()
         elif description_text and description_text.strip():
             description = description_text.strip()
         else:
-            return "❌ Error: Project description is required (file upload or text input)"
-        
-        if not description:
-            return "❌ Error: Could not parse project description"
+            yield "❌ Error: Project description is required (file upload or text input)"
+            return
         
-        # Access GitHub repository
+        # Access GitHub repository while the description file is parsed
+        yield "🔍 Accessing GitHub repository..."
         git_handler = GitHandler()
         try:
-            repo_info = git_handler.get_repository_info(git_url.strip())
+            jobs = [_run_in_thread(git_handler.get_repository_info, git_url.strip())]
+            if description_file is not None:
+                jobs.insert(0, _run_in_thread(parser.parse_bytes, description_file))
             
-            if not repo_info:
-                return "❌ Error: Could not access GitHub repository. Please check the URL."
+            # Wait for both jobs even if one fails, so nothing outlives the cleanup
+            results = await asyncio.gather(*jobs, return_exceptions=True)
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+            repo_info = results[-1]
+            if description_file is not None:
+                description = results[0]
             
-            # Evaluate the project
-            evaluator = ProjectEvaluator(api_key=api_key)
-            result = evaluator.evaluate(repo_info, description)
+            if not description:
+                yield "❌ Error: Could not parse project description"
+                return
+            
+            if not repo_info:
+                yield "❌ Error: Could not access GitHub repository. Please check the URL."
+                return
             
             # Prepare response
             repo_name = repo_info.get('name', 'Unknown')
@@ -81,6 +123,13 @@ def evaluate_project(
             language = repo_info.get('language', 'Unknown')
             files_analyzed = len(repo_info.get('files', []))
             
+            # Evaluate the project, showing the LLM response as it is generated
+            yield f"🤖 Evaluating **{repo_name}** with LLM..."
+            evaluator = _get_evaluator(api_key, model or "gpt-4o")
+            async for partial_response, result in evaluator.aevaluate_stream(repo_info, description):
+                if result is None:
+                    yield f"🤖 Evaluating **{repo_name}** with LLM...\n\n```json\n{partial_response}\n```"
+            
             score = result['score']
             explanation = result['explanation']
             
@@ -99,25 +148,180 @@ def evaluate_project(
 {explanation}
 """
             
-            return output_text
+            yield output_text
         finally:
-            # Clean up
-            git_handler.cleanup()
-            if temp_file_path and os.path.exists(temp_file_path):
-                try:
-                    os.remove(temp_file_path)
-                except Exception:
-                    pass
+            # Clean up once the response is on its way
+            _CLEANUP_POOL.submit(_cleanup, git_handler)
     
     except Exception as e:
-        import traceback
         error_msg = str(e)
         traceback.print_exc()
-        return f"❌ Error: {error_msg}"
+        yield f"❌ Error: {error_msg}"
+
+
+def submit_batch_grading(api_key: str, grading_file, description_files):
+    """
+    Submit the evaluation of several projects through the OpenAI Batch API.
+    
+    Args:
+        api_key: OpenAI API key
+        grading_file: Uploaded CSV file with one 'git_url,description_file' row per project
+        description_files: Uploaded description files, named by the CSV rows
+        
+    Returns:
+        Tuple of (markdown status, batch ID)
+    """
+    from git_handler import GitHandler
+    
+    try:
+        api_key = api_key.strip() if api_key else os.getenv('OPENAI_API_KEY')
+        if not api_key:
+            return "❌ Error: OpenAI API key is required", ""
+        
+        if grading_file is None:
+            return "❌ Error: A grading CSV file is required", ""
+        
+        rows = _read_grading_csv(grading_file.name)
+        if not rows:
+            return "❌ Error: The grading CSV file contains no projects", ""
+        
+        # Only uploaded files are read: the rows name them, never a server path
+        uploads = {Path(file.name).name: file.name for file in description_files or []}
+        
+        # Collect repositories and descriptions, skipping the ones that fail
+        parser = _get_file_parser()
+        descriptions = {}
+        jobs = []
+        skipped = []
+        for git_url, description_name in rows:
+            git_handler = GitHandler()
+            try:
+                name = Path(description_name).name
+                if name not in uploads:
+                    raise ValueError(f"Description file not uploaded: {description_name}")
+                if name not in descriptions:
+                    descriptions[name] = parser.parse(uploads[name])
+                
+                repo_info = git_handler.get_repository_info(git_url)
+                if not repo_info:
+                    raise ValueError("Could not access GitHub repository")
+                
+                jobs.append((repo_info, descriptions[name]))
+            except Exception as e:
+                skipped.append(f"- {git_url}: {str(e)}")
+            finally:
+                _CLEANUP_POOL.submit(_cleanup, git_handler)
+        
+        if not jobs:
+            return "❌ Error: No project could be prepared\n\n" + "\n".join(skipped), ""
+        
+        evaluator = _get_evaluator(api_key)
+        batch_id = evaluator.submit_batch(jobs)
+        
+        output_text = f"""# 📦 Batch Submitted
+
+- **Batch ID**: `{batch_id}`
+- **Projects**: {len(jobs)}
+
+Results are usually ready within a few hours (24 hours at most). Use **Check Status** with this batch ID to retrieve them.
+"""
+        if skipped:
+            output_text += "\n### ⚠️ Skipped Projects\n\n" + "\n".join(skipped) + "\n"
+        
+        return output_text, batch_id
+    
+    except Exception as e:
+        traceback.print_exc()
+        return f"❌ Error: {str(e)}", ""
+
+
+def check_batch_status(api_key: str, batch_id: str):
+    """
+    Check a submitted batch and collect its results when it has completed.
+    
+    Args:
+        api_key: OpenAI API key
+        batch_id: Batch ID returned on submission
+        
+    Returns:
+        Tuple of (markdown status, path of the results CSV file or None)
+    """
+    try:
+        api_key = api_key.strip() if api_key else os.getenv('OPENAI_API_KEY')
+        if not api_key:
+            return "❌ Error: OpenAI API key is required", None
+        
+        if not batch_id or not batch_id.strip():
+            return "❌ Error: Batch ID is required", None
+        
+        evaluator = _get_evaluator(api_key)
+        status = evaluator.poll_batch(batch_id.strip())
+        
+        if status['status'] != 'completed':
+            return (
+                f"⏳ Batch `{batch_id.strip()}` is **{status['status']}** "
+                f"({status['completed']}/{status['total']} requests completed)",
+                None
+            )
+        
+        # Write the results to a CSV file the user can download
+        with tempfile.NamedTemporaryFile(
+            'w',
+            suffix='.csv',
+            prefix='batch_results_',
+            delete=False,
+            newline='',
+            encoding='utf-8'
+        ) as file:
+            writer = csv.writer(file)
+            writer.writerow(['git_url', 'score', 'explanation'])
+            for result in status['results']:
+                writer.writerow([
+                    result['label'],
+                    result.get('score', ''),
+                    result.get('explanation', result.get('error', ''))
+                ])
+            results_path = file.name
+        
+        lines = [
+            "# 📊 Batch Results",
+            "",
+            "| Repository | Score |",
+            "|------------|-------|"
+        ]
+        for result in status['results']:
+            score = f"{result['score']}/100" if 'score' in result else f"❌ {result['error']}"
+            lines.append(f"| {result['label']} | {score} |")
+        
+        return "\n".join(lines) + "\n", results_path
+    
+    except Exception as e:
+        traceback.print_exc()
+        return f"❌ Error: {str(e)}", None
+
+
+def _read_grading_csv(path: str):
+    """Read (git_url, description file name) rows from a grading CSV file."""
+    with open(path, newline='', encoding='utf-8') as file:
+        rows = [row for row in csv.reader(file) if row and row[0].strip()]
+    
+    # Skip the optional header row
+    if rows and rows[0][0].strip().lower() == 'git_url':
+        rows = rows[1:]
+    
+    for line_number, row in enumerate(rows, start=1):
+        if len(row) < 2 or not row[1].strip():
+            raise ValueError(
+                f"Invalid grading CSV row {line_number}: "
+                "expected 'git_url,description_file'"
+            )
+    
+    return [(row[0].strip(), row[1].strip()) for row in rows]
 
 
 def create_interface():
     """Create and configure the Gradio interface."""
+    import gradio as gr
     
     with gr.Blocks(title="LLM as a Teacher - Project Evaluator") as demo:
         # CSS to hide the Gradio footer
@@ -135,77 +339,150 @@ def create_interface():
             """
         )
         
-        with gr.Row():
-            with gr.Column(scale=1):
-                git_url = gr.Textbox(
-                    label="GitHub Repository URL *",
-                    placeholder="https://github.com/username/repository"
-                )
-                gr.Markdown("*Enter the full URL of the GitHub repository to evaluate*")
-                
-                api_key = gr.Textbox(
-                    label="OpenAI API Key *",
-                    type="password",
-                    placeholder="sk-...",
-                    value=os.getenv('OPENAI_API_KEY', '')
-                )
-                gr.Markdown("*Your OpenAI API key for LLM evaluation*")
-                
-                with gr.Tabs():
-                    with gr.Tab("Upload File"):
-                        description_file = gr.File(
-                            label="Project Description File",
-                            file_types=[".pdf", ".docx", ".doc", ".txt", ".md"]
+        with gr.Tabs():
+            with gr.Tab("Evaluate"):
+                with gr.Row():
+                    with gr.Column(scale=1):
+                        git_url = gr.Textbox(
+                            label="GitHub Repository URL *",
+                            placeholder="https://github.com/username/repository"
+                        )
+                        gr.Markdown("*Enter the full URL of the GitHub repository to evaluate*")
+                        
+                        api_key = gr.Textbox(
+                            label="OpenAI API Key *",
+                            type="password",
+                            placeholder="sk-...",
+                            value=os.getenv('OPENAI_API_KEY', '')
+                        )
+                        gr.Markdown("*Your OpenAI API key for LLM evaluation*")
+                        
+                        model = gr.Dropdown(
+                            label="Model",
+                            choices=["gpt-4o", "gpt-4o-mini", "gpt-4.1", "gpt-4.1-mini"],
+                            value="gpt-4o",
+                            allow_custom_value=True
+                        )
+                        
+                        with gr.Tabs():
+                            with gr.Tab("Upload File"):
+                                description_file = gr.File(
+                                    label="Project Description File",
+                                    file_types=[".pdf", ".docx", ".doc", ".txt", ".md"],
+                                    type="binary"
+                                )
+                                gr.Markdown("*Supported formats: PDF, Word (.docx), Text (.txt, .md)*")
+                            
+                            with gr.Tab("Text Input"):
+                                description_text = gr.Textbox(
+                                    label="Project Description",
+                                    placeholder="Paste or type the project description here...",
+                                    lines=10
+                                )
+                                gr.Markdown("*Enter the project description as text*")
+                        
+                        evaluate_btn = gr.Button("Evaluate Project", variant="primary", size="lg")
+                        
+                        gr.Markdown("---")
+                        gr.Markdown(
+                            """
+                            ### Evaluation Criteria
+                            
+                            The evaluation is **strictly based on the expected requirements** specified in the uploaded project description file. The tool evaluates projects by:
+                            
+                            1. **Extracting Requirements**: Parses the project description to identify all specified requirements, features, and expectations
+                            2. **Code Analysis**: Analyzes the source code from the GitHub repository
+                            3. **Requirement Matching**: Compares the implemented code against each requirement from the project description
+                            4. **Scoring**: Generates a score (0-100) based solely on how well the code meets the requirements specified in the project description
+                            
+                            **Important**: The evaluation focuses exclusively on whether the code fulfills the requirements stated in the project description. It does not apply generic best practices or criteria that are not mentioned in the project description.
+                            """
                         )
-                        gr.Markdown("*Supported formats: PDF, Word (.docx), Text (.txt, .md)*")
                     
-                    with gr.Tab("Text Input"):
-                        description_text = gr.Textbox(
-                            label="Project Description",
-                            placeholder="Paste or type the project description here...",
-                            lines=10
+                    with gr.Column(scale=1):
+                        gr.Markdown("### Evaluation Results")
+                        results_output = gr.Markdown(
+                            value="Results will appear here after evaluation..."
                         )
-                        gr.Markdown("*Enter the project description as text*")
-                
-                evaluate_btn = gr.Button("Evaluate Project", variant="primary", size="lg")
-                
-                gr.Markdown("---")
+            
+            with gr.Tab("Batch Grade"):
                 gr.Markdown(
                     """
-                    ### Evaluation Criteria
-                    
-                    The evaluation is **strictly based on the expected requirements** specified in the uploaded project description file. The tool evaluates projects by:
-                    
-                    1. **Extracting Requirements**: Parses the project description to identify all specified requirements, features, and expectations
-                    2. **Code Analysis**: Analyzes the source code from the GitHub repository
-                    3. **Requirement Matching**: Compares the implemented code against each requirement from the project description
-                    4. **Scoring**: Generates a score (0-100) based solely on how well the code meets the requirements specified in the project description
+                    Grade many projects at once through the OpenAI Batch API, at half the cost of real-time evaluations. Results are ready within 24 hours.
                     
-                    **Important**: The evaluation focuses exclusively on whether the code fulfills the requirements stated in the project description. It does not apply generic best practices or criteria that are not mentioned in the project description.
+                    Upload a CSV file with one `git_url,description_file` row per project, and the description files it names.
                     """
                 )
-            
-            with gr.Column(scale=1):
-                gr.Markdown("### Evaluation Results")
-                results_output = gr.Markdown(
-                    value="Results will appear here after evaluation..."
-                )
+                
+                with gr.Row():
+                    with gr.Column(scale=1):
+                        batch_api_key = gr.Textbox(
+                            label="OpenAI API Key *",
+                            type="password",
+                            placeholder="sk-...",
+                            value=os.getenv('OPENAI_API_KEY', '')
+                        )
+                        grading_file = gr.File(
+                            label="Grading CSV File *",
+                            file_types=[".csv"]
+                        )
+                        description_files = gr.File(
+                            label="Project Description Files *",
+                            file_types=[".pdf", ".docx", ".doc", ".txt", ".md"],
+                            file_count="multiple"
+                        )
+                        submit_batch_btn = gr.Button("Submit Batch", variant="primary")
+                        
+                        gr.Markdown("---")
+                        
+                        batch_id = gr.Textbox(
+                            label="Batch ID",
+                            placeholder="batch_..."
+                        )
+                        check_batch_btn = gr.Button("Check Status")
+                    
+                    with gr.Column(scale=1):
+                        batch_output = gr.Markdown(
+                            value="Batch status will appear here..."
+                        )
+                        batch_results_file = gr.File(label="Results (CSV)")
         
         # Set up the evaluation function
         evaluate_btn.click(
             fn=evaluate_project,
-            inputs=[git_url, api_key, description_file, description_text],
+            inputs=[git_url, api_key, description_file, description_text, model],
             outputs=[results_output]
         )
+        submit_batch_btn.click(
+            fn=submit_batch_grading,
+            inputs=[batch_api_key, grading_file, description_files],
+            outputs=[batch_output, batch_id]
+        )
+        check_batch_btn.click(
+            fn=check_batch_status,
+            inputs=[batch_api_key, batch_id],
+            outputs=[batch_output, batch_results_file]
+        )
     
     return demo
 
 
 if __name__ == '__main__':
+    from dotenv import load_dotenv
+    
+    # Load environment variables from .env file
+    load_dotenv()
+    
     port = int(os.getenv('PORT', 7860))
     share = os.getenv('GRADIO_SHARE', 'False').lower() == 'true'
     
     demo = create_interface()
+    
+    # Serve several evaluations at once; they mostly wait on network I/O
+    demo.queue(
+        default_concurrency_limit=int(os.getenv('GRADIO_CONCURRENCY', 8)),
+        max_size=64
+    )
     demo.launch(
         server_name='0.0.0.0',
         server_port=port,
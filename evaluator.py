@@ -3,23 +3,626 @@ LLM-based project evaluator.
 Evaluates GitHub projects against project descriptions.
 """
 
+import asyncio
+import difflib
+import functools
+import hashlib
+import io
+import math
 import os
-from typing import Dict, Optional
+import random
+import re
+import tempfile
+import threading
+import time
+import tokenize
+import weakref
+from collections import Counter, OrderedDict
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple
 import json
 
+try:
+    import httpx
+    from openai import (
+        APIConnectionError,
+        AsyncOpenAI,
+        InternalServerError,
+        OpenAI,
+        RateLimitError
+    )
+    # Errors worth retrying with a backoff
+    _RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, InternalServerError)
+    
+    # Connection pool of the OpenAI clients. Idle connections are kept for a minute
+    # rather than the 5 seconds of httpx, since the requests of an evaluation run
+    # are often further apart and each new connection costs a TLS handshake.
+    _HTTP_LIMITS = httpx.Limits(
+        max_connections=100,
+        max_keepalive_connections=20,
+        keepalive_expiry=60
+    )
+except ImportError:
+    OpenAI = AsyncOpenAI = None
+    _RETRYABLE_ERRORS = ()
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # Cache keys are then serialized by the json module
+
+
+# Default location of the on-disk evaluation cache (override with LLM_CACHE_DIR)
+DEFAULT_CACHE_DIR = '~/.cache/llm-teacher'
+
+# Cached evaluations older than this are evaluated again
+_CACHE_TTL_SECONDS = 14 * 24 * 3600
+
+# In-process cache of raw LLM responses, keyed by content hash (most recent last)
+_MEMORY_CACHE_SIZE = 128
+_memory_cache = OrderedDict()
+
+
+def _remember(key: str, response: str, created: float):
+    """Store a raw LLM response in the in-process LRU cache."""
+    _memory_cache[key] = (created, response)
+    _memory_cache.move_to_end(key)
+    while len(_memory_cache) > _MEMORY_CACHE_SIZE:
+        _memory_cache.popitem(last=False)
+
+
+# Jobs of the batches submitted by this process, keyed by batch ID
+_batch_manifests = {}
+
+# Batch statuses after which a batch no longer changes
+_BATCH_FINAL_STATUSES = ('completed', 'failed', 'expired', 'cancelled')
+
+# Model embedding project descriptions, to reuse the evaluations of near-identical ones
+_EMBEDDING_MODEL = 'text-embedding-3-small'
+
+# In-process caches of description embeddings, keyed by description hash, and of
+# evaluations by description hash, keyed by repository hash (most recent last)
+_embeddings = OrderedDict()
+_similar_evaluations = OrderedDict()
+
+# Least share of unchanged files (Jaccard index of the file hashes) for which
+# an incremental evaluation only sends the changes since the last full one
+_DELTA_MIN_OVERLAP = 0.8
+
+# In-process cache of the last full evaluation of each repository and description
+_baselines = OrderedDict()
+
+# OpenAI clients shared by all evaluators so HTTP connections are reused, by API
+# key (most recent last). Asynchronous clients are bound to the event loop they
+# were created in. Every visitor of the web application can bring their own key,
+# so only the last _CLIENT_CACHE_SIZE keys keep a client and its connections.
+_CLIENT_CACHE_SIZE = 4
+_clients = OrderedDict()
+_clients_guard = threading.Lock()
+_async_clients = weakref.WeakKeyDictionary()
+
+# Close tasks of evicted asynchronous clients, referenced until they finish
+_closing_clients = set()
+
+# Limit on simultaneous LLM requests across all evaluations of an event loop
+_llm_semaphores = weakref.WeakKeyDictionary()
+
+# Event loop running the synchronous API in each thread
+_thread_state = threading.local()
+
+# Context window of known models, matched by prefix (longest first)
+_MODEL_CONTEXT_TOKENS = {
+    'gpt-4.1': 1047576,
+    'gpt-4o': 128000,
+    'gpt-4-turbo': 128000,
+    'gpt-4': 8192,
+    'gpt-3.5-turbo': 16385,
+    'o1': 200000,
+    'o3': 200000,
+    'o4': 200000,
+}
+_DEFAULT_CONTEXT_TOKENS = 8192
+
+# Tokens reserved for the LLM response, and the least a request may leave it
+_MAX_RESPONSE_TOKENS = 4000
+_MIN_RESPONSE_TOKENS = 512
+
+# Shortest project description worth sending to the LLM
+_MIN_DESCRIPTION_CHARS = 20
+
+# Models used for each cost/quality tier
+_MODEL_TIERS = {
+    'fast': 'gpt-4o-mini',
+    'accurate': 'gpt-4o',
+}
+
+# Response limit of a request evaluating several repositories at once
+_MAX_GROUP_RESPONSE_TOKENS = 16000
+
+# Seconds between two partial responses yielded while streaming
+_STREAM_UPDATE_INTERVAL = 0.1
+
+# Tokens the chat format adds around the messages
+_MESSAGE_OVERHEAD_TOKENS = 256
+
+# Tokens reserved for the per-shard headers of the code context
+_CONTEXT_HEADER_TOKENS = 256
+
+# Retry policy for rate limits, connection errors and server errors
+_LLM_MAX_ATTEMPTS = 6
+_LLM_BACKOFF_MIN = 1
+_LLM_BACKOFF_MAX = 30
+
+# Generated, vendored and lock files carry no grading signal
+_IGNORED_PATH_RE = re.compile(
+    r"(^|/)(node_modules|dist|vendor|__pycache__)/|\.min\.|package-lock\.json$|yarn\.lock$"
+)
+
+# Static instructions of the evaluation, sent as the system message. The text is
+# identical for every request so OpenAI's automatic prompt caching can reuse it;
+# only the user message carries the project being evaluated.
+_SYSTEM_PROMPT = """You are a STRICT and RIGOROUS code evaluator. Your task is to evaluate a GitHub project against a project description and provide a score from 0 to 100.
+
+CRITICAL EVALUATION PRINCIPLES:
+1. You must evaluate the project STRICTLY and RIGOROUSLY based on the requirements specified in the project description
+2. Be STRICT: Only award points for requirements that are FULLY and CORRECTLY implemented
+3. Partial implementations should receive PARTIAL credit only (e.g., 50% if half-complete, 0% if not functional)
+4. Missing requirements should receive 0 points
+5. Do NOT be lenient - the grade must TRULY reflect the work done in relation to the expected objectives
+6. Do NOT apply generic best practices, coding standards, or criteria that are not explicitly mentioned in the project description
+
+EVALUATION INSTRUCTIONS:
+1. Extract ALL requirements, features, and expectations from the project description
+2. Create a comprehensive list of evaluation criteria based on these requirements
+3. Analyze the source code to determine which requirements are implemented and to what extent
+4. For EACH requirement/criterion, create a detailed assessment showing:
+   - What was expected (from project description)
+   - What was actually done (from code analysis)
+   - Points awarded (0-100% of the points allocated to this requirement)
+   - Detailed justification for the points awarded
+5. Calculate the final score by summing the points for all requirements (weighted appropriately)
+6. Be STRICT: If a requirement is missing, incomplete, or non-functional, award minimal or zero points
+7. The final score must accurately reflect the percentage of requirements that are fully met
+
+REQUIRED RESPONSE FORMAT (JSON):
+{
+    "score": <number between 0 and 100, calculated strictly based on requirements met>,
+    "explanation": "<detailed explanation that MUST include a table showing each requirement, expected work, actual work done, points awarded, and justification>",
+    "evaluation_table": [
+        {
+            "requirement": "<requirement/criterion 1 from project description>",
+            "expected": "<what was expected for this requirement>",
+            "actual": "<what was actually implemented (be specific, reference code)>",
+            "points_awarded": <points out of total points for this requirement>,
+            "points_possible": <total points allocated to this requirement>,
+            "justification": "<detailed explanation of why these points were awarded>"
+        },
+        {
+            "requirement": "<requirement/criterion 2>",
+            "expected": "<what was expected>",
+            "actual": "<what was actually implemented>",
+            "points_awarded": <points>,
+            "points_possible": <points>,
+            "justification": "<explanation>"
+        }
+    ],
+    "summary": {
+        "total_points_awarded": <sum of all points_awarded>,
+        "total_points_possible": <sum of all points_possible>,
+        "requirements_fully_met": <count>,
+        "requirements_partially_met": <count>,
+        "requirements_not_met": <count>
+    }
+}
+
+EXPLANATION FORMAT REQUIREMENTS:
+The explanation field MUST include:
+1. A clear markdown table with columns: Requirement | Expected | Actual Work Done | Points Awarded | Justification
+2. For each requirement, specific references to code (file names, function names, line numbers if relevant)
+3. Clear indication of what is missing, incomplete, or incorrect
+4. A summary explaining how the final score was calculated
+
+Be concise: keep each table cell and justification to one or two sentences, and do not restate the evaluation table in the explanation beyond its markdown table.
+
+Always respond with valid JSON. Be strict in your evaluation - only award points for requirements that are fully and correctly implemented."""
+
+_SYSTEM_MESSAGE = {"role": "system", "content": _SYSTEM_PROMPT}
+
+# Closing instruction of the user message, after the project being evaluated
+_PROMPT_SUFFIX = """Be STRICT and RIGOROUS. The grade must truly reflect the work done. Provide your evaluation in valid JSON format:"""
+
+# Models whose responses can be constrained to _EVALUATION_SCHEMA; other models
+# only get JSON mode, matched by prefix like _MODEL_CONTEXT_TOKENS
+_STRUCTURED_OUTPUT_MODELS = ('gpt-4o', 'gpt-4.1', 'o3', 'o4')
+
+# Reasoning models, matched by prefix, reject any temperature but the default
+_REASONING_MODELS = ('o1', 'o3', 'o4')
+
+_EVALUATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "score": {"type": "integer"},
+        "explanation": {"type": "string"},
+        "evaluation_table": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "requirement": {"type": "string"},
+                    "expected": {"type": "string"},
+                    "actual": {"type": "string"},
+                    "points_awarded": {"type": "number"},
+                    "points_possible": {"type": "number"},
+                    "justification": {"type": "string"}
+                },
+                "required": [
+                    "requirement", "expected", "actual",
+                    "points_awarded", "points_possible", "justification"
+                ],
+                "additionalProperties": False
+            }
+        },
+        "summary": {
+            "type": "object",
+            "properties": {
+                "total_points_awarded": {"type": "number"},
+                "total_points_possible": {"type": "number"},
+                "requirements_fully_met": {"type": "integer"},
+                "requirements_partially_met": {"type": "integer"},
+                "requirements_not_met": {"type": "integer"}
+            },
+            "required": [
+                "total_points_awarded", "total_points_possible", "requirements_fully_met",
+                "requirements_partially_met", "requirements_not_met"
+            ],
+            "additionalProperties": False
+        }
+    },
+    "required": ["score", "explanation", "evaluation_table", "summary"],
+    "additionalProperties": False
+}
+
+# Response of a request evaluating several repositories, identified by number
+_GROUP_EVALUATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "results": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "repo_id": {"type": "integer"},
+                    **_EVALUATION_SCHEMA["properties"]
+                },
+                "required": ["repo_id"] + _EVALUATION_SCHEMA["required"],
+                "additionalProperties": False
+            }
+        }
+    },
+    "required": ["results"],
+    "additionalProperties": False
+}
+
+# Files the evaluation should see first: entry points and READMEs
+_ENTRY_POINT_RE = re.compile(
+    r"(^|/)((main|app|index|server|cli|manage|__main__)\.\w+|README(\.\w+)?)$",
+    re.IGNORECASE
+)
+
+# Smallest share of a file worth sending when only part of it fits the budget
+_MIN_PARTIAL_FILE_TOKENS = 200
+
+# Appended to truncated files, and an upper bound of its token count
+_TRUNCATION_MARK = "\n... (truncated)"
+_TRUNCATION_MARK_TOKENS = 8
+
+# Rule around the header of each file in the code context
+_FILE_SEPARATOR = "=" * 60
+
+# Runs of blank lines collapsed to a single one in the code context
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+# Languages with // and /* */ comments, and a pattern matching those comments
+# or the string literals that may contain them
+_C_STYLE_EXTENSIONS = frozenset({
+    '.js', '.jsx', '.ts', '.tsx', '.java', '.c', '.cpp', '.h', '.hpp', '.cs',
+    '.go', '.rs', '.swift', '.kt', '.scala', '.php'
+})
+_C_STYLE_COMMENT_RE = re.compile(
+    r"(\"(?:\\.|[^\"\\\n])*\"|'(?:\\.|[^'\\\n])*'|`(?:\\.|[^`\\])*`)|//[^\n]*|/\*.*?\*/",
+    re.DOTALL
+)
+
+# Words used to compare files with the description (camelCase and snake_case aware)
+_WORD_RE = re.compile(r"[A-Z]?[a-z]{2,}|[A-Z]{2,}(?![a-z])")
+
+
+def _thread_loop() -> asyncio.AbstractEventLoop:
+    """Return the event loop used by the synchronous API in this thread."""
+    loop = getattr(_thread_state, 'loop', None)
+    if loop is None or loop.is_closed():
+        loop = asyncio.new_event_loop()
+        _thread_state.loop = loop
+    return loop
+
+
+def _llm_semaphore() -> asyncio.Semaphore:
+    """Return the semaphore shared by the LLM requests of the running event loop."""
+    loop = asyncio.get_event_loop()
+    if loop not in _llm_semaphores:
+        _llm_semaphores[loop] = asyncio.Semaphore(int(os.getenv('LLM_CONCURRENCY', 8)))
+    return _llm_semaphores[loop]
+
+
+async def _wait_before_retry(attempt: int, error: Exception) -> bool:
+    """
+    Wait before retrying a failed LLM call.
+    
+    Honors the Retry-After header sent with rate limit errors, otherwise waits
+    a random exponential delay. Returns False if the call should not be retried.
+    """
+    if attempt + 1 >= _LLM_MAX_ATTEMPTS:
+        return False
+    
+    if not isinstance(error, _RETRYABLE_ERRORS):
+        return False
+    
+    delay = None
+    response = getattr(error, 'response', None)
+    if response is not None:
+        try:
+            delay = float(response.headers.get('retry-after'))
+        except (TypeError, ValueError):
+            pass
+    if delay is None:
+        delay = random.uniform(0, min(_LLM_BACKOFF_MAX, _LLM_BACKOFF_MIN * 2 ** attempt))
+        delay = max(_LLM_BACKOFF_MIN, delay)
+    
+    await asyncio.sleep(delay)
+    return True
+
+
+@functools.lru_cache(maxsize=None)
+def _get_encoding(model: str):
+    """Return the tiktoken encoding of a model (None if it cannot be loaded)."""
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    
+    # The encodings are downloaded on first use, so they can be missing offline
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding('cl100k_base')
+    except Exception:
+        return None
+
+
+def _count_tokens(text: str, model: str) -> int:
+    """Count the tokens of a text for a model."""
+    encoding = _get_encoding(model)
+    if encoding is None:
+        # Roughly 4 characters per token for English text and code
+        return len(text) // 4 + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _truncate_tokens(text: str, model: str, max_tokens: int) -> str:
+    """Cut a text to at most max_tokens tokens for a model, marking the cut."""
+    encoding = _get_encoding(model)
+    if encoding is None:
+        # Same 4 characters per token estimate as _count_tokens()
+        if len(text) <= max_tokens * 4:
+            return text
+        return text[:max_tokens * 4] + _TRUNCATION_MARK
+    
+    tokens = encoding.encode(text, disallowed_special=())
+    if len(tokens) <= max_tokens:
+        return text
+    return encoding.decode(tokens[:max_tokens]) + _TRUNCATION_MARK
+
+
+def _strip_python_comments(content: str) -> str:
+    """Remove the comments of Python code, leaving it unchanged if it does not tokenize."""
+    try:
+        comments = [
+            token.start for token in tokenize.generate_tokens(io.StringIO(content).readline)
+            if token.type == tokenize.COMMENT
+        ]
+    except (tokenize.TokenError, SyntaxError):
+        return content
+    
+    # Split like the readline the rows come from: splitlines() also breaks on
+    # characters such as \x0c or \u2028, which would shift the rows
+    lines = io.StringIO(content).readlines()
+    for row, column in comments:
+        line = lines[row - 1]
+        lines[row - 1] = line[:column] + line[len(line.rstrip('\r\n')):]
+    return ''.join(lines)
+
+
+def _minify_for_llm(content: str, extension: str, strip_comments: bool = False) -> str:
+    """
+    Remove what costs tokens without informing the evaluation.
+    
+    Args:
+        content: File content
+        extension: Lowercase file extension, selecting the comment syntax
+        strip_comments: Also remove Python and C-style comments
+    """
+    if strip_comments:
+        if extension == '.py':
+            content = _strip_python_comments(content)
+        elif extension in _C_STYLE_EXTENSIONS:
+            content = _C_STYLE_COMMENT_RE.sub(
+                lambda match: match.group(1) or '', content
+            )
+    content = '\n'.join(line.rstrip() for line in content.split('\n'))
+    return _BLANK_LINES_RE.sub('\n\n', content).strip('\n')
+
+
+# In-process cache of rendered files, keyed by the digest rather than the content
+# so the cache does not keep every file content alive
+_rendered_files = OrderedDict()
+
+
+def _render_file(
+    path: str,
+    content: str,
+    model: str,
+    max_tokens: int,
+    strip_comments: bool = False
+) -> Tuple[str, int]:
+    """Render a repository file for the code context, with its token count."""
+    key = (path, _content_digest(content), model, max_tokens, strip_comments)
+    rendered = _rendered_files.get(key)
+    if rendered is not None:
+        _rendered_files.move_to_end(key)
+        return rendered
+    
+    content = _minify_for_llm(content, Path(path).suffix.lower(), strip_comments)
+    
+    # Truncate very long files
+    content = _truncate_tokens(content, model, max_tokens)
+    
+    text = f"\n{_FILE_SEPARATOR}\nFile: {path}\n{_FILE_SEPARATOR}\n{content}"
+    rendered = (text, _count_tokens(text, model))
+    _bounded_store(_rendered_files, key, rendered)
+    return rendered
+
+
+def _terms(text: str) -> List[str]:
+    """Split a text into lowercase words."""
+    return [word.lower() for word in _WORD_RE.findall(text)]
+
+
+def _relevance_scores(description: str, documents: List[str]) -> List[float]:
+    """Score documents by TF-IDF cosine similarity with the description."""
+    description_tf = Counter(_terms(description))
+    documents_tf = [Counter(_terms(document)) for document in documents]
+    
+    # Inverse document frequency over the repository files
+    document_frequency = Counter()
+    for tf in documents_tf:
+        document_frequency.update(tf.keys())
+    idf = {
+        term: math.log((1 + len(documents)) / (1 + count)) + 1
+        for term, count in document_frequency.items()
+    }
+    
+    description_vector = {term: count * idf.get(term, 0) for term, count in description_tf.items()}
+    description_norm = math.sqrt(sum(value * value for value in description_vector.values()))
+    
+    scores = []
+    for tf in documents_tf:
+        vector = {term: count * idf[term] for term, count in tf.items()}
+        norm = math.sqrt(sum(value * value for value in vector.values()))
+        dot = sum(value * vector.get(term, 0) for term, value in description_vector.items())
+        scores.append(dot / (norm * description_norm) if norm and description_norm else 0.0)
+    return scores
+
+
+def _canonical_json(data) -> bytes:
+    """Serialize data with sorted keys, to the same bytes with or without orjson."""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(
+        data, sort_keys=True, separators=(',', ':'), ensure_ascii=False
+    ).encode('utf-8')
+
+
+def _content_digest(content: str) -> str:
+    """SHA-256 of a file content."""
+    # Not memoized: a cache keyed by the content would keep every file alive
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def _bounded_store(cache: OrderedDict, key: str, value):
+    """Store a value in an in-process LRU cache of _MEMORY_CACHE_SIZE entries."""
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > _MEMORY_CACHE_SIZE:
+        cache.popitem(last=False)
+
+
+def _store_client(clients: OrderedDict, api_key: str, client) -> List:
+    """Store a client in an LRU cache of _CLIENT_CACHE_SIZE keys, returning the evicted ones."""
+    clients[api_key] = client
+    evicted = []
+    while len(clients) > _CLIENT_CACHE_SIZE:
+        evicted.append(clients.popitem(last=False)[1])
+    return evicted
+
+
+def _write_json(path: Path, data):
+    """Write a cache file, ignoring failures since the cache is an optimization."""
+    # Write to a temporary file first so readers never see partial JSON
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as file:
+            json.dump(data, file)
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+
+def _cosine_similarity(a: List[float], b: List[float]) -> float:
+    """Cosine similarity of two embeddings."""
+    norm = math.sqrt(sum(value * value for value in a)) * math.sqrt(sum(value * value for value in b))
+    return sum(x * y for x, y in zip(a, b)) / norm if norm else 0.0
+
 
 class ProjectEvaluator:
     """Evaluate projects using LLM."""
     
-    def __init__(self, model: str = "gpt-4o", api_key: Optional[str] = None):
+    def __init__(
+        self,
+        model: Optional[str] = None,
+        api_key: Optional[str] = None,
+        shard_tokens: int = 50000,
+        cache: bool = True,
+        tier: str = "accurate",
+        max_output_tokens: int = _MAX_RESPONSE_TOKENS,
+        cache_dir: Optional[str] = None,
+        semantic_threshold: Optional[float] = None,
+        incremental: bool = False
+    ):
         """
         Initialize the evaluator.
         
         Args:
-            model: LLM model to use (default: gpt-4o)
+            model: LLM model to use (default: the model of the tier)
             api_key: OpenAI API key (or set OPENAI_API_KEY env var)
+            shard_tokens: Maximum number of code tokens sent in a single LLM request
+            cache: Reuse and store LLM responses in the evaluation cache
+            tier: "accurate" (gpt-4o) or "fast" (gpt-4o-mini, cheaper and quicker)
+            max_output_tokens: Maximum number of tokens of an evaluation response
+            cache_dir: Directory of the on-disk cache (default: LLM_CACHE_DIR or
+                ~/.cache/llm-teacher; an empty string keeps the cache in memory)
+            semantic_threshold: Reuse the cached evaluation of the same code against
+                a description whose embedding has at least this cosine similarity
+                (e.g. 0.97; default: only identical requests are reused)
+            incremental: When most files are unchanged since the last full evaluation
+                of a repository, only send the changed files and that evaluation
         """
-        self.model = model
+        if tier not in _MODEL_TIERS:
+            raise ValueError(
+                f"Unknown tier '{tier}'. Choose one of: {', '.join(_MODEL_TIERS)}"
+            )
+        if max_output_tokens < _MIN_RESPONSE_TOKENS:
+            raise ValueError(
+                f"max_output_tokens must be at least {_MIN_RESPONSE_TOKENS}"
+            )
+        self.model = model or _MODEL_TIERS[tier]
+        self.max_output_tokens = max_output_tokens
+        self.shard_tokens = shard_tokens
+        self.cache = cache
+        self.cache_dir = cache_dir
+        self.semantic_threshold = semantic_threshold
+        self.incremental = incremental
         self.api_key = api_key or os.getenv('OPENAI_API_KEY')
         
         if not self.api_key:
@@ -39,48 +642,955 @@ class ProjectEvaluator:
         Returns:
             Dictionary with 'score' (0-100) and 'explanation'
         """
-        # Prepare code context
-        code_context = self._prepare_code_context(repo_info)
+        return _thread_loop().run_until_complete(self.aevaluate(repo_info, description))
+    
+    def evaluate_many(
+        self,
+        repo_infos: List[Dict],
+        description: str,
+        rows_per_call: int = 4
+    ) -> List[Dict]:
+        """
+        Evaluate several repositories against the same project description.
+        
+        Small repositories are evaluated together, rows_per_call per request,
+        so the instructions and description are sent once per group.
+        
+        Args:
+            repo_infos: Repository information dictionaries
+            description: Project description text
+            rows_per_call: Maximum number of repositories evaluated by one request
+            
+        Returns:
+            One dictionary per repository, in order, with either 'score' and
+            'explanation' or 'error'
+        """
+        return _thread_loop().run_until_complete(
+            self.aevaluate_many(repo_infos, description, rows_per_call)
+        )
+    
+    def evaluate_stream(
+        self,
+        repo_info: Dict,
+        description: str
+    ) -> Iterator[Tuple[str, Optional[Dict]]]:
+        """
+        Evaluate a repository, yielding the LLM response as it is generated.
+        
+        Args:
+            repo_info: Repository information dictionary
+            description: Project description text
+            
+        Yields:
+            (partial response, None) tuples while the response is generated,
+            then a final (response, result) tuple where result is the dictionary
+            returned by evaluate()
+        """
+        loop = _thread_loop()
+        stream = self.aevaluate_stream(repo_info, description)
+        try:
+            while True:
+                try:
+                    yield loop.run_until_complete(stream.__anext__())
+                except StopAsyncIteration:
+                    break
+        finally:
+            loop.run_until_complete(stream.aclose())
+    
+    async def aevaluate(self, repo_info: Dict, description: str) -> Dict:
+        """
+        Asynchronously evaluate a repository against a project description.
+        
+        Each shard of files is sent as a concurrent request.
+        
+        Args:
+            repo_info: Repository information dictionary
+            description: Project description text
+            
+        Returns:
+            Dictionary with 'score' (0-100) and 'explanation'
+        """
+        result = self._check_inputs(repo_info, description)
+        if result is not None:
+            return result
+        
+        shards = self._shard_prompts(repo_info, description)
+        result = await self._asimilar_evaluation(repo_info, description, shards)
+        if result is None:
+            result = await self._aevaluate_delta(repo_info, description, shards)
+        if result is None:
+            result = await self._aevaluate_shards(shards)
+            await self._aremember_similar(repo_info, description, result)
+            self._store_baseline(repo_info, description, result)
+        return result
+    
+    async def aevaluate_many(
+        self,
+        repo_infos: List[Dict],
+        description: str,
+        rows_per_call: int = 4
+    ) -> List[Dict]:
+        """Asynchronous version of evaluate_many()."""
+        results = [self._check_inputs(repo_info, description) for repo_info in repo_infos]
+        
+        # Repositories needing a large share of a request are evaluated alone
+        group_tokens = self.shard_tokens // max(rows_per_call, 1)
+        singles = []
+        groups = [[]]
+        for index, repo_info in enumerate(repo_infos):
+            if results[index] is not None:
+                continue
+            contexts = self._shard_contexts(repo_info, description)
+            if rows_per_call > 1 and len(contexts) == 1 and self._count_tokens(contexts[0]) <= group_tokens:
+                if len(groups[-1]) == rows_per_call:
+                    groups.append([])
+                groups[-1].append((index, contexts[0]))
+            else:
+                singles.append(index)
+        singles += [group[0][0] for group in groups if len(group) == 1]
+        groups = [group for group in groups if len(group) > 1]
+        
+        async def evaluate_single(index: int):
+            try:
+                results[index] = await self.aevaluate(repo_infos[index], description)
+            except Exception as e:
+                results[index] = {'error': str(e)}
+        
+        async def evaluate_group(group: List[Tuple[int, str]]):
+            try:
+                evaluations = await self._aevaluate_group(
+                    [(repo_infos[index], context) for index, context in group],
+                    description
+                )
+            except Exception:
+                evaluations = [None] * len(group)
+            
+            # Repositories the group response left out are evaluated alone
+            await asyncio.gather(*[
+                evaluate_single(index)
+                for (index, _), evaluation in zip(group, evaluations)
+                if evaluation is None
+            ])
+            for (index, _), evaluation in zip(group, evaluations):
+                if evaluation is not None:
+                    results[index] = evaluation
+        
+        await asyncio.gather(
+            *[evaluate_single(index) for index in singles],
+            *[evaluate_group(group) for group in groups]
+        )
+        return results
+    
+    async def _aevaluate_group(
+        self,
+        group: List[Tuple[Dict, str]],
+        description: str
+    ) -> List[Optional[Dict]]:
+        """Evaluate (repo_info, code context) pairs with a single request."""
+        prompt = self._create_group_prompt(group, description)
+        options = {
+            'schema': _GROUP_EVALUATION_SCHEMA,
+            'max_tokens': min(_MAX_GROUP_RESPONSE_TOKENS, self.max_output_tokens * len(group))
+        }
+        key = self._cache_key(prompt, **options)
+        
+        response = self._load_cached(key)
+        fetched = response is None
+        if fetched:
+            response = await self._acall_llm(
+                self._get_async_client(), _llm_semaphore(), prompt, **options
+            )
+        
+        evaluations = [None] * len(group)
+        for data in self._decode_response(response).get('results') or []:
+            repo_id = data.get('repo_id')
+            if isinstance(repo_id, int) and 1 <= repo_id <= len(group):
+                evaluations[repo_id - 1] = self._build_result(data)
+        # Only responses that could be read are cached
+        if fetched:
+            self._store_cached(key, response)
+        return evaluations
+    
+    async def aevaluate_stream(
+        self,
+        repo_info: Dict,
+        description: str
+    ) -> AsyncIterator[Tuple[str, Optional[Dict]]]:
+        """Asynchronous version of evaluate_stream()."""
+        result = self._check_inputs(repo_info, description)
+        if result is not None:
+            yield '', result
+            return
+        
+        shards = self._shard_prompts(repo_info, description)
+        result = await self._asimilar_evaluation(repo_info, description, shards)
+        if result is None:
+            result = await self._aevaluate_delta(repo_info, description, shards)
+        if result is not None:
+            yield '', result
+            return
+        
+        # Several shards are evaluated concurrently and cached responses are
+        # complete, so there is nothing to stream
+        response = self._load_cached(shards[0][0])
+        if len(shards) > 1 or response is not None:
+            result = await self._aevaluate_shards(shards)
+            await self._aremember_similar(repo_info, description, result)
+            self._store_baseline(repo_info, description, result)
+            yield response or '', result
+            return
+        
+        key, prompt = shards[0]
+        parts = []
+        last_update = 0.0
+        async with _llm_semaphore():
+            deltas = self._astream_llm(self._get_async_client(), prompt)
+            try:
+                async for delta in deltas:
+                    parts.append(delta)
+                    
+                    # Deltas arriving close together are reported in one update
+                    now = time.monotonic()
+                    if now - last_update >= _STREAM_UPDATE_INTERVAL:
+                        last_update = now
+                        yield "".join(parts), None
+            finally:
+                await deltas.aclose()
+        
+        response = "".join(parts)
+        
+        result = self._combine([response])
+        self._store_cached(key, response)
+        await self._aremember_similar(repo_info, description, result)
+        self._store_baseline(repo_info, description, result)
+        yield response, result
+    
+    async def _aevaluate_shards(self, shards: List[Tuple[str, str]]) -> Dict:
+        """Evaluate (cache key, prompt) shards concurrently and combine them."""
+        # Reuse previous evaluations of the exact same inputs
+        responses = [self._load_cached(key) for key, _ in shards]
+        missing = [index for index, response in enumerate(responses) if response is None]
+        
+        if missing:
+            client = self._get_async_client()
+            results = await asyncio.gather(
+                *[
+                    self._acall_llm(client, _llm_semaphore(), shards[index][1])
+                    for index in missing
+                ],
+                return_exceptions=True
+            )
+            
+            # Keep the shards that succeeded so a retry only pays for the others;
+            # a response that cannot be read is not kept
+            errors = []
+            for index, result in zip(missing, results):
+                if not isinstance(result, BaseException):
+                    try:
+                        self._parse_response(result)
+                    except Exception as e:
+                        result = e
+                if isinstance(result, BaseException):
+                    errors.append(result)
+                else:
+                    self._store_cached(shards[index][0], result)
+                    responses[index] = result
+            if errors:
+                raise errors[0]
+        
+        return self._combine(responses)
+    
+    def submit_batch(self, jobs: List[Tuple[Dict, str]]) -> str:
+        """
+        Submit evaluations through the OpenAI Batch API.
+        
+        Batch requests cost half the price of real-time requests and complete
+        within 24 hours. Use poll_batch() or wait_batch() to retrieve the results.
+        Jobs that do not need the LLM, such as repositories without code or
+        descriptions too short to evaluate against, are not sent and their
+        results are returned with the others.
+        
+        Args:
+            jobs: List of (repo_info, description) tuples to evaluate
+            
+        Returns:
+            The batch ID
+        """
+        client = self._get_client()
+        
+        manifest = []
+        lines = []
+        submitted = set()
+        for repo_info, description in jobs:
+            label = repo_info.get('url', repo_info.get('name', 'Unknown'))
+            try:
+                result = self._check_inputs(repo_info, description)
+            except ValueError as e:
+                result = {'error': str(e)}
+            if result is not None:
+                manifest.append({'label': label, 'result': result})
+                continue
+            
+            shards = self._shard_prompts(repo_info, description)
+            manifest.append({'label': label, 'keys': [key for key, _ in shards]})
+            
+            for key, prompt in shards:
+                # Custom IDs must be unique within a batch
+                if key in submitted:
+                    continue
+                submitted.add(key)
+                lines.append(json.dumps({
+                    'custom_id': key,
+                    'method': 'POST',
+                    'url': '/v1/chat/completions',
+                    'body': self._chat_request(prompt)
+                }))
+        
+        # Without any request the results are already known
+        if not lines:
+            batch_id = f"local_{hashlib.sha256(_canonical_json(manifest)).hexdigest()[:32]}"
+            self._save_batch_manifest(batch_id, manifest)
+            return batch_id
+        
+        try:
+            batch_file = client.files.create(
+                file=('batch.jsonl', "\n".join(lines).encode('utf-8')),
+                purpose='batch'
+            )
+            batch = client.batches.create(
+                input_file_id=batch_file.id,
+                endpoint='/v1/chat/completions',
+                completion_window='24h'
+            )
+        except Exception as e:
+            raise Exception(f"Error submitting batch: {str(e)}")
+        
+        self._save_batch_manifest(batch.id, manifest)
+        return batch.id
+    
+    def poll_batch(self, batch_id: str) -> Dict:
+        """
+        Check a batch submitted with submit_batch() and collect its results.
+        
+        Args:
+            batch_id: ID returned by submit_batch()
+            
+        Returns:
+            Dictionary with 'status', 'completed', 'total' and 'results'. Once the
+            batch has completed, 'results' holds one dictionary per job with
+            'label' and either 'score' and 'explanation' or 'error'.
+        """
+        manifest = self._load_batch_manifest(batch_id)
+        if all('result' in job for job in manifest):
+            return {
+                'status': 'completed',
+                'completed': 0,
+                'total': 0,
+                'results': [{'label': job['label'], **job['result']} for job in manifest]
+            }
+        
+        client = self._get_client()
+        
+        try:
+            batch = client.batches.retrieve(batch_id)
+        except Exception as e:
+            raise Exception(f"Error retrieving batch: {str(e)}")
+        
+        counts = batch.request_counts
+        status = {
+            'status': batch.status,
+            'completed': counts.completed if counts else 0,
+            'total': counts.total if counts else 0,
+            'results': []
+        }
+        if batch.status != 'completed':
+            return status
+        
+        # Store every successful response so later evaluations hit the cache
+        responses = {}
+        errors = {}
+        if batch.output_file_id:
+            output = client.files.content(batch.output_file_id).text
+            for line in output.splitlines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                response = record.get('response') or {}
+                if response.get('status_code') != 200:
+                    continue
+                choice = response['body']['choices'][0]
+                if choice.get('finish_reason') == 'length' or choice['message'].get('content') is None:
+                    continue
+                content = choice['message']['content']
+                try:
+                    self._parse_response(content)
+                except Exception as e:
+                    errors[record['custom_id']] = str(e)
+                    continue
+                responses[record['custom_id']] = content
+                self._store_cached(record['custom_id'], content)
+        
+        for job in manifest:
+            if 'result' in job:
+                status['results'].append({'label': job['label'], **job['result']})
+                continue
+            shard_responses = [
+                responses.get(key) or self._load_cached(key) for key in job['keys']
+            ]
+            job_errors = [errors[key] for key in job['keys'] if key in errors]
+            if job_errors:
+                status['results'].append({'label': job['label'], 'error': job_errors[0]})
+            elif any(response is None for response in shard_responses):
+                status['results'].append({
+                    'label': job['label'],
+                    'error': 'The batch returned no response for this evaluation'
+                })
+            else:
+                status['results'].append({
+                    'label': job['label'],
+                    **self._combine(shard_responses)
+                })
+        
+        return status
+    
+    def wait_batch(
+        self,
+        batch_id: str,
+        poll_interval: float = 60,
+        timeout: Optional[float] = None
+    ) -> Dict:
+        """
+        Wait for a batch submitted with submit_batch() to finish.
+        
+        Args:
+            batch_id: ID returned by submit_batch()
+            poll_interval: Seconds between two status checks
+            timeout: Maximum number of seconds to wait (None waits until the batch ends)
+            
+        Returns:
+            The last poll_batch() status, with the results if the batch completed
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            status = self.poll_batch(batch_id)
+            if status['status'] in _BATCH_FINAL_STATUSES:
+                return status
+            if deadline is not None and time.monotonic() + poll_interval > deadline:
+                return status
+            time.sleep(poll_interval)
+    
+    def _shard_prompts(self, repo_info: Dict, description: str) -> List[Tuple[str, str]]:
+        """Build the (cache key, prompt) pair of every shard of a repository."""
+        prompts = []
+        for context in self._shard_contexts(repo_info, description):
+            prompt = self._create_evaluation_prompt(repo_info, description, context)
+            prompts.append((self._cache_key(prompt), prompt))
+        return prompts
+    
+    def _check_inputs(self, repo_info: Dict, description: str) -> Optional[Dict]:
+        """
+        Handle inputs whose evaluation does not need the LLM.
+        
+        Returns:
+            The evaluation of a repository without code, None if the LLM is needed
+        
+        Raises:
+            ValueError: If the project description is too short to evaluate against
+        """
+        if len((description or '').strip()) < _MIN_DESCRIPTION_CHARS:
+            raise ValueError(
+                f"The project description is too short to evaluate against "
+                f"(less than {_MIN_DESCRIPTION_CHARS} characters)"
+            )
+        # Generated and vendored files are never sent either
+        if not self._evaluated_files(repo_info.get('files', [])):
+            return {
+                'score': 0,
+                'explanation': 'No code files found in the repository.'
+            }
+        return None
+    
+    def _shard_contexts(self, repo_info: Dict, description: str) -> List[str]:
+        """Build the code context of every shard of a repository."""
+        # Everything but the code counts against the model context window
+        base_request = self._chat_request(
+            self._create_evaluation_prompt(repo_info, description, '')
+        )
+        overhead = sum(
+            self._count_tokens(message['content']) for message in base_request['messages']
+        )
+        budget = (
+            self._model_context_tokens()
+            - overhead
+            - self.max_output_tokens
+            - _CONTEXT_HEADER_TOKENS
+        )
+        if budget <= 0:
+            raise ValueError(
+                f"The project description is too long for the {self.model} context window"
+            )
+        if os.getenv('MAX_CODE_TOKENS'):
+            budget = min(budget, int(os.getenv('MAX_CODE_TOKENS')))
+        
+        # Split the most relevant code into shards small enough for a single request
+        files = self._select_files(repo_info.get('files', []), description, budget)
+        shards = self._shard_files(files, min(self.shard_tokens, budget))
+        
+        return [
+            self._prepare_code_context(
+                repo_info,
+                shard,
+                (index, len(shards)) if len(shards) > 1 else None
+            )
+            for index, shard in enumerate(shards)
+        ]
+    
+    def _combine(self, responses: List[str]) -> Dict:
+        """Build the final result from the raw responses of every shard."""
+        shard_data = [self._decode_response(response) for response in responses]
+        if len(shard_data) == 1:
+            return self._build_result(shard_data[0])
+        return self._build_result(self._merge_shards(shard_data))
+    
+    def _cache_key(self, prompt: str, **options) -> str:
+        """Compute the content hash identifying the LLM request of a prompt."""
+        return hashlib.sha256(_canonical_json(self._chat_request(prompt, **options))).hexdigest()
+    
+    def _cache_path(self, key: str) -> Optional[Path]:
+        """Return the on-disk cache file for a key (None if disabled)."""
+        cache_dir = self.cache_dir
+        if cache_dir is None:
+            cache_dir = os.getenv('LLM_CACHE_DIR', DEFAULT_CACHE_DIR)
+        if not cache_dir:
+            return None
+        # Spread the entries over subdirectories so none grows too large
+        return Path(cache_dir).expanduser() / key[:2] / f"{key}.json"
+    
+    def _load_cached(self, key: str) -> Optional[str]:
+        """Look up a cached raw LLM response in memory, then on disk."""
+        if not self.cache:
+            return None
+        
+        expired = time.time() - _CACHE_TTL_SECONDS
+        if key in _memory_cache:
+            created, response = _memory_cache[key]
+            if created >= expired:
+                _memory_cache.move_to_end(key)
+                return response
+            del _memory_cache[key]
+        
+        path = self._cache_path(key)
+        if path is None or not path.exists():
+            return None
+        
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                entry = json.load(file)
+            created, response = float(entry['created']), entry['response']
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        if created < expired:
+            return None
+        
+        _remember(key, response, created)
+        return response
+    
+    def _store_cached(self, key: str, response: str):
+        """Cache a raw LLM response in memory and persist it to disk."""
+        if not self.cache:
+            return
+        
+        created = time.time()
+        _remember(key, response, created)
+        
+        path = self._cache_path(key)
+        if path is None:
+            return
+        
+        _write_json(path, {'model': self.model, 'created': created, 'response': response})
+    
+    async def _asimilar_evaluation(
+        self,
+        repo_info: Dict,
+        description: str,
+        shards: List[Tuple[str, str]]
+    ) -> Optional[Dict]:
+        """Find the cached evaluation of the same code against a near-identical description."""
+        if self.semantic_threshold is None or not self.cache:
+            return None
+        # Identical requests are answered by the response cache
+        if all(self._load_cached(key) is not None for key, _ in shards):
+            return None
+        
+        embedding = await self._aembed(description)
+        if embedding is None:
+            return None
+        
+        result = None
+        best = self.semantic_threshold
+        for entry in self._load_similar(self._repo_key(repo_info)).values():
+            similarity = _cosine_similarity(embedding, entry['embedding'])
+            if similarity >= best:
+                result, best = entry['result'], similarity
+        return result
+    
+    async def _aremember_similar(self, repo_info: Dict, description: str, result: Dict):
+        """Record an evaluation so near-identical descriptions can reuse it."""
+        if self.semantic_threshold is None or not self.cache:
+            return
+        repo_key = self._repo_key(repo_info)
+        entries = dict(self._load_similar(repo_key))
+        description_key = hashlib.sha256(description.encode('utf-8')).hexdigest()
+        if description_key in entries:
+            return
+        
+        embedding = await self._aembed(description)
+        if embedding is None:
+            return
+        entries[description_key] = {
+            'created': time.time(),
+            'embedding': embedding,
+            'result': result
+        }
+        _bounded_store(_similar_evaluations, repo_key, entries)
+        
+        path = self._cache_path(f"{repo_key}-similar")
+        if path is not None:
+            _write_json(path, entries)
+    
+    def _load_similar(self, repo_key: str) -> Dict[str, Dict]:
+        """Load the unexpired evaluations of a repository, by description hash."""
+        entries = _similar_evaluations.get(repo_key)
+        if entries is None:
+            entries = {}
+            path = self._cache_path(f"{repo_key}-similar")
+            if path is not None and path.exists():
+                try:
+                    with open(path, 'r', encoding='utf-8') as file:
+                        entries = json.load(file)
+                except (OSError, ValueError):
+                    pass
+            _bounded_store(_similar_evaluations, repo_key, entries)
+        
+        expired = time.time() - _CACHE_TTL_SECONDS
+        return {key: entry for key, entry in entries.items() if entry['created'] >= expired}
+    
+    async def _aembed(self, description: str) -> Optional[List[float]]:
+        """Embed a project description, or return None if the embedding fails."""
+        key = hashlib.sha256(description.encode('utf-8')).hexdigest()
+        if key in _embeddings:
+            return _embeddings[key]
+        
+        try:
+            async with _llm_semaphore():
+                response = await self._get_async_client().embeddings.create(
+                    model=_EMBEDDING_MODEL,
+                    input=description
+                )
+        except Exception:
+            # Reusing near matches is only a shortcut; evaluate in full instead
+            return None
+        
+        embedding = list(response.data[0].embedding)
+        _bounded_store(_embeddings, key, embedding)
+        return embedding
+    
+    def _repo_key(self, repo_info: Dict) -> str:
+        """Hash the code of a repository, as evaluated by this model."""
+        # Combine the digests of the files rather than hashing their contents again
+        payload = _canonical_json([self.model] + [
+            [self._file_path(file_info), _content_digest(file_info.get('content', ''))]
+            for file_info in repo_info.get('files', [])
+        ])
+        return hashlib.sha256(payload).hexdigest()
+    
+    async def _aevaluate_delta(
+        self,
+        repo_info: Dict,
+        description: str,
+        shards: List[Tuple[str, str]]
+    ) -> Optional[Dict]:
+        """
+        Re-evaluate the changes since the last full evaluation of a repository.
+        
+        Returns:
+            The evaluation, or None if the repository must be evaluated in full
+        """
+        if not self.incremental or not self.cache:
+            return None
+        # Identical requests are answered by the response cache
+        if all(self._load_cached(key) is not None for key, _ in shards):
+            return None
+        
+        baseline = self._load_baseline(repo_info, description)
+        if baseline is None:
+            return None
+        
+        hashes = self._file_hashes(repo_info)
+        previous = baseline['file_hashes']
+        blocks, previous_blocks = set(hashes.items()), set(previous.items())
+        if not blocks | previous_blocks:
+            return None
+        overlap = len(blocks & previous_blocks) / len(blocks | previous_blocks)
+        if overlap < _DELTA_MIN_OVERLAP or overlap == 1:
+            return None
+        
+        # Only the files a full evaluation would send can count as changes
+        changed = [
+            file_info for file_info in self._evaluated_files(repo_info.get('files', []))
+            if hashes[self._file_path(file_info)] != previous.get(self._file_path(file_info))
+        ]
+        removed = sorted(set(previous) - set(hashes))
+        
+        # The changes are sent whole, with the previous evaluation, or not at all
+        try:
+            base_request = self._chat_request(
+                self._create_delta_prompt(repo_info, description, '', baseline['result'], removed)
+            )
+        except ValueError:
+            return None
+        overhead = sum(
+            self._count_tokens(message['content']) for message in base_request['messages']
+        )
+        budget = min(
+            self.shard_tokens,
+            self._model_context_tokens() - overhead - self.max_output_tokens - _CONTEXT_HEADER_TOKENS
+        )
+        if sum(self._file_tokens(file_info) for file_info in changed) > budget:
+            return None
         
-        # Create evaluation prompt
-        prompt = self._create_evaluation_prompt(
+        prompt = self._create_delta_prompt(
             repo_info,
             description,
-            code_context
+            self._prepare_code_context(repo_info, changed) if changed else 'No files changed.',
+            baseline['result'],
+            removed
         )
+        key = self._cache_key(prompt)
+        response = self._load_cached(key)
+        if response is not None:
+            return self._combine([response])
+        response = await self._acall_llm(self._get_async_client(), _llm_semaphore(), prompt)
+        result = self._combine([response])
+        self._store_cached(key, response)
+        return result
+    
+    def _baseline_key(self, repo_info: Dict, description: str) -> str:
+        """Identify a repository evaluated by this model against a description."""
+        payload = _canonical_json([self.model, repo_info.get('url', ''), description])
+        return hashlib.sha256(payload).hexdigest()
+    
+    def _load_baseline(self, repo_info: Dict, description: str) -> Optional[Dict]:
+        """Load the last full evaluation of a repository, if it has not expired."""
+        key = self._baseline_key(repo_info, description)
+        baseline = _baselines.get(key)
+        if baseline is None:
+            path = self._cache_path(f"{key}-baseline")
+            if path is None or not path.exists():
+                return None
+            try:
+                with open(path, 'r', encoding='utf-8') as file:
+                    baseline = json.load(file)
+            except (OSError, ValueError):
+                return None
+            _bounded_store(_baselines, key, baseline)
+        
+        if baseline['created'] < time.time() - _CACHE_TTL_SECONDS:
+            return None
+        return baseline
+    
+    def _store_baseline(self, repo_info: Dict, description: str, result: Dict):
+        """Record a full evaluation as the reference of incremental evaluations."""
+        if not self.incremental or not self.cache:
+            return
+        key = self._baseline_key(repo_info, description)
+        baseline = {
+            'created': time.time(),
+            'file_hashes': self._file_hashes(repo_info),
+            'result': result
+        }
+        _bounded_store(_baselines, key, baseline)
         
-        # Call LLM
-        response = self._call_llm(prompt)
+        path = self._cache_path(f"{key}-baseline")
+        if path is not None:
+            _write_json(path, baseline)
+    
+    def _file_hashes(self, repo_info: Dict) -> Dict[str, str]:
+        """Hash the content of every evaluated file of a repository, by path."""
+        return {
+            self._file_path(file_info): _content_digest(file_info.get('content', ''))
+            for file_info in self._evaluated_files(repo_info.get('files', []))
+        }
+    
+    def _save_batch_manifest(self, batch_id: str, manifest: List[Dict]):
+        """Remember which shards belong to each job of a batch."""
+        _batch_manifests[batch_id] = manifest
         
-        # Parse response
-        result = self._parse_response(response)
+        path = self._cache_path(f"batch_{batch_id}")
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as file:
+                json.dump(manifest, file)
+        except OSError:
+            pass
+    
+    def _load_batch_manifest(self, batch_id: str) -> List[Dict]:
+        """Load the job manifest saved by submit_batch()."""
+        if batch_id in _batch_manifests:
+            return _batch_manifests[batch_id]
         
-        return result
+        path = self._cache_path(f"batch_{batch_id}")
+        if path is None or not path.exists():
+            raise ValueError(f"Unknown batch: {batch_id}")
+        with open(path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    
+    def _model_context_tokens(self) -> int:
+        """Return the context window size of the model."""
+        for prefix in sorted(_MODEL_CONTEXT_TOKENS, key=len, reverse=True):
+            if self.model.startswith(prefix):
+                return _MODEL_CONTEXT_TOKENS[prefix]
+        return _DEFAULT_CONTEXT_TOKENS
+    
+    def _count_tokens(self, text: str) -> int:
+        """Count the tokens of a text for the model."""
+        return _count_tokens(text, self.model)
+    
+    def _select_files(
+        self,
+        files: List[Dict],
+        description: str,
+        budget_tokens: int
+    ) -> List[Dict]:
+        """
+        Pick the files most relevant to the description within a token budget.
+        
+        Empty, generated and vendored files are dropped. Entry points and READMEs
+        come first, then the others by TF-IDF similarity with the description,
+        and files are packed greedily until the budget is spent. The first file
+        that does not fit is cut to the remaining budget. Selected files keep
+        their repository order.
+        """
+        candidates = self._evaluated_files(files)
+        scores = _relevance_scores(
+            description,
+            [f"{self._file_path(file_info)}\n{file_info.get('content', '')}" for file_info in candidates]
+        )
+        ranking = sorted(
+            range(len(candidates)),
+            key=lambda index: (
+                not _ENTRY_POINT_RE.search(self._file_path(candidates[index])),
+                -scores[index]
+            )
+        )
+        
+        selected = {}
+        used = 0
+        for index in ranking:
+            file_info = candidates[index]
+            tokens = self._file_tokens(file_info)
+            if used + tokens <= budget_tokens:
+                selected[index] = file_info
+                used += tokens
+                continue
+            
+            # Send the beginning of the file if a useful part of it fits
+            header = self._file_tokens(dict(file_info, content=''))
+            remaining = budget_tokens - used - header - _TRUNCATION_MARK_TOKENS
+            if remaining >= _MIN_PARTIAL_FILE_TOKENS:
+                content = _minify_for_llm(
+                    file_info['content'],
+                    Path(self._file_path(file_info)).suffix.lower(),
+                    self._strip_comments()
+                )
+                content = _truncate_tokens(content, self.model, remaining)
+                selected[index] = dict(file_info, content=content)
+                break
+            # Otherwise a smaller file may still fit
+        
+        return [selected[index] for index in sorted(selected)]
+    
+    def _evaluated_files(self, files: List[Dict]) -> List[Dict]:
+        """Drop the empty, generated and vendored files, which are never evaluated."""
+        return [
+            file_info for file_info in files
+            if file_info.get('content', '').strip()
+            and not _IGNORED_PATH_RE.search(self._file_path(file_info))
+        ]
+    
+    def _shard_files(self, files: List[Dict], shard_tokens: int) -> List[List[Dict]]:
+        """Split repository files into groups evaluated by separate requests."""
+        shards = [[]]
+        used = 0
+        for file_info in files:
+            tokens = self._file_tokens(file_info)
+            if shards[-1] and used + tokens > shard_tokens:
+                shards.append([])
+                used = 0
+            shards[-1].append(file_info)
+            used += tokens
+        return shards
+    
+    def _file_path(self, file_info: Dict) -> str:
+        """Return the display path of a repository file."""
+        return file_info.get('path', file_info.get('name', 'unknown'))
     
-    def _prepare_code_context(self, repo_info: Dict) -> str:
-        """Prepare code context from repository files."""
-        files = repo_info.get('files', [])
+    def _format_file(self, file_info: Dict) -> str:
+        """Render a repository file for the code context."""
+        return self._rendered_file(file_info)[0]
+    
+    def _file_tokens(self, file_info: Dict) -> int:
+        """Count the tokens of a rendered repository file."""
+        return self._rendered_file(file_info)[1]
+    
+    def _rendered_file(self, file_info: Dict) -> Tuple[str, int]:
+        """Render a file once for every evaluation that includes it."""
+        return _render_file(
+            self._file_path(file_info),
+            file_info.get('content', ''),
+            self.model,
+            int(os.getenv('MAX_FILE_TOKENS', 2500)),
+            self._strip_comments()
+        )
+    
+    def _strip_comments(self) -> bool:
+        """Whether comments are removed from the code sent to the LLM."""
+        return os.getenv('STRIP_COMMENTS', '').lower() in ('1', 'true', 'yes')
+    
+    def _prepare_code_context(
+        self,
+        repo_info: Dict,
+        files: List[Dict],
+        part: Optional[Tuple[int, int]] = None
+    ) -> str:
+        """
+        Prepare code context from repository files.
         
+        Args:
+            repo_info: Repository information dictionary
+            files: Files to include in this context
+            part: (index, count) of this shard when the repository is split
+        """
         if not files:
             return "No code files found in repository."
         
         context_parts = []
         context_parts.append(f"Repository: {repo_info.get('name', 'Unknown')}")
         context_parts.append(f"Language: {repo_info.get('language', 'Unknown')}")
-        context_parts.append(f"\nCode Files ({len(files)} files):\n")
+        if part:
+            index, count = part
+            context_parts.append(
+                f"\nNOTE: The repository is split into {count} parts evaluated separately. "
+                f"This is part {index + 1} of {count}; evaluate the requirements "
+                f"against the files below only."
+            )
+            context_parts.append(f"\nCode Files (part {index + 1} of {count}, {len(files)} files):\n")
+        else:
+            context_parts.append(f"\nCode Files ({len(files)} files):\n")
         
-        for file_info in files[:20]:  # Limit to 20 files
-            path = file_info.get('path', file_info.get('name', 'unknown'))
-            content = file_info.get('content', '')
-            
-            # Truncate very long files
-            if len(content) > 10000:
-                content = content[:10000] + "\n... (truncated)"
-            
-            context_parts.append(f"\n{'='*60}")
-            context_parts.append(f"File: {path}")
-            context_parts.append(f"{'='*60}")
-            context_parts.append(content)
+        context_parts.extend(self._format_file(file_info) for file_info in files)
         
         return "\n".join(context_parts)
     
@@ -91,17 +1601,11 @@ class ProjectEvaluator:
         code_context: str
     ) -> str:
         """Create the evaluation prompt for the LLM."""
-        prompt = f"""You are a STRICT and RIGOROUS code evaluator. Your task is to evaluate a GitHub project against a project description and provide a score from 0 to 100.
-
-CRITICAL EVALUATION PRINCIPLES:
-1. You must evaluate the project STRICTLY and RIGOROUSLY based on the requirements specified in the project description
-2. Be STRICT: Only award points for requirements that are FULLY and CORRECTLY implemented
-3. Partial implementations should receive PARTIAL credit only (e.g., 50% if half-complete, 0% if not functional)
-4. Missing requirements should receive 0 points
-5. Do NOT be lenient - the grade must TRULY reflect the work done in relation to the expected objectives
-6. Do NOT apply generic best practices, coding standards, or criteria that are not explicitly mentioned in the project description
-
-PROJECT DESCRIPTION:
+        # The static instructions and the description come first, so every request
+        # against the same description shares its prefix with the previous ones
+        # and gets the OpenAI prompt caching discount; the group and incremental
+        # prompts keep the same order
+        return f"""PROJECT DESCRIPTION:
 {description}
 
 REPOSITORY INFORMATION:
@@ -112,179 +1616,360 @@ REPOSITORY INFORMATION:
 SOURCE CODE:
 {code_context}
 
-EVALUATION INSTRUCTIONS:
-1. Extract ALL requirements, features, and expectations from the project description
-2. Create a comprehensive list of evaluation criteria based on these requirements
-3. Analyze the source code to determine which requirements are implemented and to what extent
-4. For EACH requirement/criterion, create a detailed assessment showing:
-   - What was expected (from project description)
-   - What was actually done (from code analysis)
-   - Points awarded (0-100% of the points allocated to this requirement)
-   - Detailed justification for the points awarded
-5. Calculate the final score by summing the points for all requirements (weighted appropriately)
-6. Be STRICT: If a requirement is missing, incomplete, or non-functional, award minimal or zero points
-7. The final score must accurately reflect the percentage of requirements that are fully met
+{_PROMPT_SUFFIX}"""
+    
+    def _create_delta_prompt(
+        self,
+        repo_info: Dict,
+        description: str,
+        code_context: str,
+        previous: Dict,
+        removed: List[str]
+    ) -> str:
+        """Create the prompt re-evaluating the files changed since a previous evaluation."""
+        removed_files = "\n".join(f"- {path}" for path in removed) or "None"
+        return f"""PROJECT DESCRIPTION:
+{description}
 
-REQUIRED RESPONSE FORMAT (JSON):
-{{
-    "score": <number between 0 and 100, calculated strictly based on requirements met>,
-    "explanation": "<detailed explanation that MUST include a table showing each requirement, expected work, actual work done, points awarded, and justification>",
-    "evaluation_table": [
-        {{
-            "requirement": "<requirement/criterion 1 from project description>",
-            "expected": "<what was expected for this requirement>",
-            "actual": "<what was actually implemented (be specific, reference code)>",
-            "points_awarded": <points out of total points for this requirement>,
-            "points_possible": <total points allocated to this requirement>,
-            "justification": "<detailed explanation of why these points were awarded>"
-        }},
-        {{
-            "requirement": "<requirement/criterion 2>",
-            "expected": "<what was expected>",
-            "actual": "<what was actually implemented>",
-            "points_awarded": <points>,
-            "points_possible": <points>,
-            "justification": "<explanation>"
-        }}
-    ],
-    "summary": {{
-        "total_points_awarded": <sum of all points_awarded>,
-        "total_points_possible": <sum of all points_possible>,
-        "requirements_fully_met": <count>,
-        "requirements_partially_met": <count>,
-        "requirements_not_met": <count>
-    }}
-}}
+REPOSITORY INFORMATION:
+- Name: {repo_info.get('name', 'Unknown')}
+- Language: {repo_info.get('language', 'Unknown')}
+- URL: {repo_info.get('url', 'Unknown')}
 
-EXPLANATION FORMAT REQUIREMENTS:
-The explanation field MUST include:
-1. A clear markdown table with columns: Requirement | Expected | Actual Work Done | Points Awarded | Justification
-2. For each requirement, specific references to code (file names, function names, line numbers if relevant)
-3. Clear indication of what is missing, incomplete, or incorrect
-4. A summary explaining how the final score was calculated
+PREVIOUS EVALUATION (score {previous.get('score', 0)}/100) of an earlier version of the repository:
+{previous.get('explanation', '')}
 
-Be STRICT and RIGOROUS. The grade must truly reflect the work done. Provide your evaluation in valid JSON format:"""
-        
-        return prompt
+The repository changed since this evaluation. Only the changed and added files are shown below; every other file is unchanged. Re-evaluate the whole project: keep the previous assessment of the requirements the changes do not affect, and re-assess the ones they do.
+
+REMOVED FILES:
+{removed_files}
+
+CHANGED AND ADDED FILES:
+{code_context}
+
+{_PROMPT_SUFFIX}"""
     
-    def _call_llm(self, prompt: str) -> str:
-        """Call the LLM API."""
-        try:
-            from openai import OpenAI
-            
-            client = OpenAI(api_key=self.api_key)
+    def _create_group_prompt(self, group: List[Tuple[Dict, str]], description: str) -> str:
+        """Create the prompt evaluating several repositories against one description."""
+        sections = [
+            f"PROJECT DESCRIPTION:\n{description}",
+            f"The {len(group)} repositories below are separate submissions for this project. "
+            "Evaluate each one independently, as if it were the only one, and return one "
+            "evaluation per repository in \"results\", each with its \"repo_id\" number "
+            "and the fields of the required response format."
+        ]
+        for repo_id, (repo_info, code_context) in enumerate(group, start=1):
+            sections.append(f"""REPOSITORY {repo_id}:
+- Name: {repo_info.get('name', 'Unknown')}
+- Language: {repo_info.get('language', 'Unknown')}
+- URL: {repo_info.get('url', 'Unknown')}
+
+SOURCE CODE OF REPOSITORY {repo_id}:
+{code_context}""")
+        sections.append(_PROMPT_SUFFIX)
+        return "\n\n".join(sections)
+    
+    def _get_client(self):
+        """Return the shared synchronous OpenAI client for the API key."""
+        with _clients_guard:
+            client = _clients.get(self.api_key)
+            if client is not None:
+                _clients.move_to_end(self.api_key)
+                return client
             
-            response = client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a strict and rigorous code evaluator. Always respond with valid JSON. Be strict in your evaluation - only award points for requirements that are fully and correctly implemented."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                temperature=0.2,  # Lower temperature for more consistent, strict evaluations
-                max_tokens=4000  # Increased for detailed tables and explanations
+            if OpenAI is None:
+                raise ImportError(
+                    "OpenAI library is required. Install with: pip install openai"
+                )
+            client = OpenAI(
+                api_key=self.api_key,
+                http_client=httpx.Client(limits=_HTTP_LIMITS, follow_redirects=True)
             )
-            
-            return response.choices[0].message.content
-        except ImportError:
+            evicted = _store_client(_clients, self.api_key, client)
+        
+        for evicted_client in evicted:
+            evicted_client.close()
+        return client
+    
+    def _get_async_client(self):
+        """Return the shared asynchronous OpenAI client for the API key and event loop."""
+        loop = asyncio.get_event_loop()
+        clients = _async_clients.setdefault(loop, OrderedDict())
+        client = clients.get(self.api_key)
+        if client is not None:
+            clients.move_to_end(self.api_key)
+            return client
+        
+        if AsyncOpenAI is None:
             raise ImportError(
                 "OpenAI library is required. Install with: pip install openai"
             )
-        except Exception as e:
-            raise Exception(f"Error calling LLM: {str(e)}")
+        # Retries are handled by _wait_before_retry()
+        client = AsyncOpenAI(
+            api_key=self.api_key,
+            max_retries=0,
+            http_client=httpx.AsyncClient(limits=_HTTP_LIMITS, follow_redirects=True)
+        )
+        for evicted_client in _store_client(clients, self.api_key, client):
+            task = loop.create_task(evicted_client.close())
+            _closing_clients.add(task)
+            task.add_done_callback(_closing_clients.discard)
+        return client
+    
+    def _chat_request(
+        self,
+        prompt: str,
+        schema: Dict = _EVALUATION_SCHEMA,
+        max_tokens: Optional[int] = None
+    ) -> Dict:
+        """Build the chat completion parameters for an evaluation prompt."""
+        request = {
+            'model': self.model,
+            'messages': [
+                _SYSTEM_MESSAGE,
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            'max_completion_tokens': self._response_tokens(prompt, max_tokens),  # Detailed tables and explanations
+            'response_format': self._response_format(schema)
+        }
+        if not self.model.startswith(_REASONING_MODELS):
+            # Lower temperature for more consistent, strict evaluations; repeatable
+            # answers also keep cached evaluations representative
+            request['temperature'] = 0.2
+        return request
+    
+    def _response_tokens(self, prompt: str, max_tokens: Optional[int] = None) -> int:
+        """Size the response budget from what the prompt leaves of the context window."""
+        max_tokens = max_tokens or self.max_output_tokens
+        prompt_tokens = self._count_tokens(_SYSTEM_MESSAGE['content']) + self._count_tokens(prompt)
+        available = self._model_context_tokens() - prompt_tokens - _MESSAGE_OVERHEAD_TOKENS
+        if available < _MIN_RESPONSE_TOKENS:
+            raise ValueError(
+                f"The evaluation prompt ({prompt_tokens} tokens) leaves too little room "
+                f"for a response in the {self.model} context window"
+            )
+        return min(max_tokens, available)
+    
+    def _response_format(self, schema: Dict = _EVALUATION_SCHEMA) -> Dict:
+        """Ask for a schema-conforming response when the model supports it, JSON otherwise."""
+        if self.model.startswith(_STRUCTURED_OUTPUT_MODELS):
+            return {
+                'type': 'json_schema',
+                'json_schema': {
+                    'name': 'evaluation',
+                    'strict': True,
+                    'schema': schema
+                }
+            }
+        return {'type': 'json_object'}
+    
+    async def _acall_llm(
+        self,
+        client,
+        semaphore: asyncio.Semaphore,
+        prompt: str,
+        **options
+    ) -> str:
+        """Call the LLM API, limiting the number of concurrent requests."""
+        async with semaphore:
+            attempt = 0
+            while True:
+                try:
+                    response = await client.chat.completions.create(
+                        **self._chat_request(prompt, **options)
+                    )
+                    break
+                except Exception as e:
+                    if not await _wait_before_retry(attempt, e):
+                        raise Exception(f"Error calling LLM: {str(e)}")
+                    attempt += 1
+                    # The client was closed if it has been evicted from the cache
+                    if client.is_closed():
+                        client = self._get_async_client()
+        
+        choice = response.choices[0]
+        if choice.finish_reason == 'length':
+            raise Exception("Error calling LLM: the response was cut off at the maximum length")
+        if choice.message.content is None:
+            # Structured outputs report a refusal instead of an evaluation
+            refusal = getattr(choice.message, 'refusal', None) or 'no content'
+            raise Exception(f"Error calling LLM: the model returned no evaluation ({refusal})")
+        return choice.message.content
+    
+    async def _astream_llm(self, client, prompt: str) -> AsyncIterator[str]:
+        """Stream the LLM response, yielding text deltas as they arrive."""
+        attempt = 0
+        finish_reason = None
+        refusal = []
+        while True:
+            streamed = False
+            try:
+                stream = await client.chat.completions.create(
+                    stream=True,
+                    **self._chat_request(prompt)
+                )
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    choice = chunk.choices[0]
+                    finish_reason = choice.finish_reason or finish_reason
+                    if getattr(choice.delta, 'refusal', None):
+                        refusal.append(choice.delta.refusal)
+                    if choice.delta.content:
+                        streamed = True
+                        yield choice.delta.content
+                break
+            except Exception as e:
+                # A partially streamed response cannot be retried transparently
+                if streamed or not await _wait_before_retry(attempt, e):
+                    raise Exception(f"Error calling LLM: {str(e)}")
+                attempt += 1
+                if client.is_closed():
+                    client = self._get_async_client()
+        
+        if finish_reason == 'length':
+            raise Exception("Error calling LLM: the response was cut off at the maximum length")
+        if refusal:
+            raise Exception(f"Error calling LLM: the model returned no evaluation ({''.join(refusal)})")
     
     def _parse_response(self, response: str) -> Dict:
         """Parse LLM response and extract score and explanation."""
+        return self._build_result(self._decode_response(response))
+    
+    def _decode_response(self, response: str) -> Dict:
+        """Decode the JSON payload of an LLM response."""
+        # The response format guarantees JSON, so anything else is an error
         try:
-            # Try to extract JSON from response
-            response = response.strip()
-            
-            # Remove markdown code blocks if present
-            if response.startswith('```'):
-                lines = response.split('\n')
-                response = '\n'.join(lines[1:-1]) if len(lines) > 2 else response
-            
-            # Parse JSON
-            data = json.loads(response)
-            
-            score = int(data.get('score', 0))
-            # Ensure score is between 0 and 100
-            score = max(0, min(100, score))
-            
-            explanation = data.get('explanation', 'No explanation provided.')
-            
-            # Build detailed explanation with evaluation table
-            detailed_explanation = explanation
-            
-            # Add evaluation table if present
-            if 'evaluation_table' in data and data['evaluation_table']:
-                detailed_explanation += "\n\n## 📊 Detailed Evaluation Table\n\n"
-                detailed_explanation += "| Requirement | Expected | Actual Work Done | Points Awarded | Justification |\n"
-                detailed_explanation += "|------------|----------|------------------|----------------|---------------|\n"
-                
-                for item in data['evaluation_table']:
-                    req = item.get('requirement', 'N/A')
-                    expected = item.get('expected', 'N/A')
-                    actual = item.get('actual', 'N/A')
-                    points_awarded = item.get('points_awarded', 0)
-                    points_possible = item.get('points_possible', 0)
-                    justification = item.get('justification', 'N/A')
-                    
-                    # Escape pipe characters in table cells
-                    req = str(req).replace('|', '\\|')
-                    expected = str(expected).replace('|', '\\|')
-                    actual = str(actual).replace('|', '\\|')
-                    justification = str(justification).replace('|', '\\|')
-                    
-                    points_str = f"{points_awarded}/{points_possible}" if points_possible > 0 else str(points_awarded)
-                    detailed_explanation += f"| {req} | {expected} | {actual} | {points_str} | {justification} |\n"
-            
-            # Add summary if present
-            if 'summary' in data and data['summary']:
-                summary = data['summary']
-                detailed_explanation += "\n\n## 📈 Evaluation Summary\n\n"
-                detailed_explanation += f"- **Total Points Awarded**: {summary.get('total_points_awarded', 0)}\n"
-                detailed_explanation += f"- **Total Points Possible**: {summary.get('total_points_possible', 0)}\n"
-                detailed_explanation += f"- **Requirements Fully Met**: {summary.get('requirements_fully_met', 0)}\n"
-                detailed_explanation += f"- **Requirements Partially Met**: {summary.get('requirements_partially_met', 0)}\n"
-                detailed_explanation += f"- **Requirements Not Met**: {summary.get('requirements_not_met', 0)}\n"
-            
-            # Keep backward compatibility with old format
-            if 'strengths' in data and data['strengths']:
-                detailed_explanation += "\n\n### ✅ Strengths:\n"
-                for strength in data['strengths']:
-                    detailed_explanation += f"- {strength}\n"
-            
-            if 'weaknesses' in data and data['weaknesses']:
-                detailed_explanation += "\n\n### ❌ Weaknesses:\n"
-                for weakness in data['weaknesses']:
-                    detailed_explanation += f"- {weakness}\n"
-            
-            if 'missing_features' in data and data['missing_features']:
-                detailed_explanation += "\n\n### ⚠️ Missing Features:\n"
-                for feature in data['missing_features']:
-                    detailed_explanation += f"- {feature}\n"
-            
-            return {
-                'score': score,
-                'explanation': detailed_explanation
-            }
-        except json.JSONDecodeError:
-            # Fallback: try to extract score and explanation from text
-            import re
-            
-            # Try to find score
-            score_match = re.search(r'score["\']?\s*[:=]\s*(\d+)', response, re.IGNORECASE)
-            score = int(score_match.group(1)) if score_match else 50
-            
-            # Use the response as explanation
-            return {
-                'score': max(0, min(100, score)),
-                'explanation': response
-            }
-
+            return json.loads(response)
+        except json.JSONDecodeError as e:
+            raise Exception(f"Error parsing LLM response: {str(e)}")
+    
+    def _merge_shards(self, shard_data: List[Dict]) -> Dict:
+        """
+        Combine the evaluations of several shards into a single evaluation.
+        
+        A requirement counts as implemented if any shard found it, so each
+        requirement keeps its best assessment across shards. The score is the
+        weighted mean of points awarded over points possible.
+        """
+        merged = {}
+        for data in shard_data:
+            for item in data.get('evaluation_table') or []:
+                name = re.sub(r'\W+', ' ', str(item.get('requirement', ''))).strip().lower()
+                match = difflib.get_close_matches(name, list(merged), n=1, cutoff=0.8)
+                key = match[0] if match else name
+                if key not in merged or self._item_ratio(item) > self._item_ratio(merged[key]):
+                    merged[key] = item
+        
+        table = list(merged.values())
+        awarded = sum((self._points(item, 'points_awarded') for item in table), 0.0)
+        possible = sum((self._points(item, 'points_possible') for item in table), 0.0)
+        
+        if possible > 0:
+            score = round(100 * awarded / possible)
+        else:
+            scores = [self._points(data, 'score') for data in shard_data]
+            score = round(sum(scores) / len(scores))
+        
+        explanation = [
+            f"The repository was evaluated in {len(shard_data)} parts; "
+            "each requirement keeps its best assessment across parts."
+        ]
+        for index, data in enumerate(shard_data):
+            explanation.append(f"\n\n### Part {index + 1}\n\n{data.get('explanation', 'No explanation provided.')}")
+        
+        # Show whole totals without a trailing ".0"
+        awarded = int(awarded) if awarded.is_integer() else awarded
+        possible = int(possible) if possible.is_integer() else possible
+        
+        ratios = [self._item_ratio(item) for item in table]
+        return {
+            'score': score,
+            'explanation': "".join(explanation),
+            'evaluation_table': table,
+            'summary': {
+                'total_points_awarded': awarded,
+                'total_points_possible': possible,
+                'requirements_fully_met': sum(1 for ratio in ratios if ratio >= 1),
+                'requirements_partially_met': sum(1 for ratio in ratios if 0 < ratio < 1),
+                'requirements_not_met': sum(1 for ratio in ratios if ratio <= 0)
+            } if table else {}
+        }
+    
+    def _points(self, item: Dict, field: str) -> float:
+        """Read a numeric field from an evaluation item."""
+        try:
+            return float(item.get(field, 0) or 0)
+        except (TypeError, ValueError):
+            return 0.0
+    
+    def _item_ratio(self, item: Dict) -> float:
+        """Fraction of the possible points awarded for a requirement."""
+        possible = self._points(item, 'points_possible')
+        if possible <= 0:
+            return 0.0
+        return self._points(item, 'points_awarded') / possible
+    
+    def _build_result(self, data: Dict) -> Dict:
+        """Build the score and markdown explanation from a decoded evaluation."""
+        score = int(data.get('score', 0))
+        # Ensure score is between 0 and 100
+        score = max(0, min(100, score))
+        
+        explanation = data.get('explanation', 'No explanation provided.')
+        
+        # Build detailed explanation with evaluation table
+        parts = [explanation]
+        
+        # Add evaluation table if present
+        if 'evaluation_table' in data and data['evaluation_table']:
+            parts.append("\n\n## 📊 Detailed Evaluation Table\n\n")
+            parts.append("| Requirement | Expected | Actual Work Done | Points Awarded | Justification |\n")
+            parts.append("|------------|----------|------------------|----------------|---------------|\n")
+            parts.extend(self._table_row(item) for item in data['evaluation_table'])
+        
+        # Add summary if present
+        if 'summary' in data and data['summary']:
+            summary = data['summary']
+            parts.append("\n\n## 📈 Evaluation Summary\n\n")
+            parts.append(f"- **Total Points Awarded**: {summary.get('total_points_awarded', 0)}\n")
+            parts.append(f"- **Total Points Possible**: {summary.get('total_points_possible', 0)}\n")
+            parts.append(f"- **Requirements Fully Met**: {summary.get('requirements_fully_met', 0)}\n")
+            parts.append(f"- **Requirements Partially Met**: {summary.get('requirements_partially_met', 0)}\n")
+            parts.append(f"- **Requirements Not Met**: {summary.get('requirements_not_met', 0)}\n")
+        
+        # Keep backward compatibility with old format
+        if 'strengths' in data and data['strengths']:
+            parts.append("\n\n### ✅ Strengths:\n")
+            parts.extend(f"- {strength}\n" for strength in data['strengths'])
+        
+        if 'weaknesses' in data and data['weaknesses']:
+            parts.append("\n\n### ❌ Weaknesses:\n")
+            parts.extend(f"- {weakness}\n" for weakness in data['weaknesses'])
+        
+        if 'missing_features' in data and data['missing_features']:
+            parts.append("\n\n### ⚠️ Missing Features:\n")
+            parts.extend(f"- {feature}\n" for feature in data['missing_features'])
+        
+        detailed_explanation = "".join(parts)
+        
+        return {
+            'score': score,
+            'explanation': detailed_explanation
+        }
+    
+    def _table_row(self, item: Dict) -> str:
+        """Render one evaluation table item as a markdown table row."""
+        # Escape pipe characters in table cells
+        req = str(item.get('requirement', 'N/A')).replace('|', '\\|')
+        expected = str(item.get('expected', 'N/A')).replace('|', '\\|')
+        actual = str(item.get('actual', 'N/A')).replace('|', '\\|')
+        justification = str(item.get('justification', 'N/A')).replace('|', '\\|')
+        
+        points_awarded = item.get('points_awarded', 0)
+        points_possible = item.get('points_possible', 0)
+        points_str = f"{points_awarded}/{points_possible}" if points_possible > 0 else str(points_awarded)
+        return f"| {req} | {expected} | {actual} | {points_str} | {justification} |\n"
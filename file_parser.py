@@ -3,9 +3,25 @@ File parser for project descriptions.
 Supports PDF, Word (.docx), and plain text files.
 """
 
+import io
+import multiprocessing
 import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import BinaryIO, List, Optional, Tuple, Union
+
+
+# PDFs with at least this many pages have their pages extracted in parallel
+_PARALLEL_PDF_PAGES = 16
+
+
+def _extract_pdf_pages(job: Tuple[bytes, int, int]) -> List[str]:
+    """Extract the text of a range of PDF pages (runs in a worker process)."""
+    import pdfplumber
+    
+    data, start, stop = job
+    with pdfplumber.open(io.BytesIO(data)) as pdf:
+        return [pdf.pages[index].extract_text() or "" for index in range(start, stop)]
 
 
 class FileParser:
@@ -47,35 +63,99 @@ class FileParser:
         except Exception as e:
             raise Exception(f"Error parsing file {file_path}: {str(e)}")
     
-    def _parse_pdf(self, path: Path) -> str:
+    def parse_bytes(self, data: bytes, filename_hint: Optional[str] = None) -> Optional[str]:
+        """
+        Parse a project description already held in memory.
+        
+        Args:
+            data: Raw content of the file
+            filename_hint: Original file name, used to pick the format; when it
+                has no extension the format is detected from the content
+            
+        Returns:
+            Extracted text content or None if parsing fails
+        """
+        extension = Path(filename_hint or '').suffix.lower() or self._detect_extension(data)
+        
+        if extension not in self.supported_extensions:
+            raise ValueError(
+                f"Unsupported file type: {extension}. "
+                f"Supported types: {', '.join(self.supported_extensions)}"
+            )
+        
+        try:
+            if extension == '.pdf':
+                return self._parse_pdf(io.BytesIO(data))
+            elif extension in {'.docx', '.doc'}:
+                return self._parse_word(io.BytesIO(data))
+            else:  # .txt, .md
+                return data.decode('utf-8').strip()
+        except Exception as e:
+            raise Exception(f"Error parsing file {filename_hint or 'upload'}: {str(e)}")
+    
+    def _detect_extension(self, data: bytes) -> str:
+        """Guess the file extension from the leading bytes of the content."""
+        if data.startswith(b'%PDF'):
+            return '.pdf'
+        if data.startswith(b'PK\x03\x04'):
+            return '.docx'
+        if data.startswith(b'\xd0\xcf\x11\xe0'):
+            return '.doc'
+        return '.txt'
+    
+    def _parse_pdf(self, source: Union[Path, BinaryIO]) -> str:
         """Parse PDF file using PyPDF2 or pdfplumber."""
         try:
             import pdfplumber
-            text = ""
-            with pdfplumber.open(path) as pdf:
-                for page in pdf.pages:
-                    text += page.extract_text() or ""
-            return text.strip()
         except ImportError:
             try:
                 import PyPDF2
-                text = ""
-                with open(path, 'rb') as file:
-                    pdf_reader = PyPDF2.PdfReader(file)
-                    for page in pdf_reader.pages:
-                        text += page.extract_text()
-                return text.strip()
+                if isinstance(source, Path):
+                    with open(source, 'rb') as file:
+                        pdf_reader = PyPDF2.PdfReader(file)
+                        texts = [page.extract_text() or "" for page in pdf_reader.pages]
+                else:
+                    pdf_reader = PyPDF2.PdfReader(source)
+                    texts = [page.extract_text() or "" for page in pdf_reader.pages]
+                return "\n".join(texts).strip()
             except ImportError:
                 raise ImportError(
                     "PDF parsing requires either 'pdfplumber' or 'PyPDF2'. "
                     "Install with: pip install pdfplumber"
                 )
+        
+        with pdfplumber.open(source) as pdf:
+            page_count = len(pdf.pages)
+            if page_count < _PARALLEL_PDF_PAGES:
+                return "\n".join(page.extract_text() or "" for page in pdf.pages).strip()
+        
+        return "\n".join(self._extract_pages_in_parallel(source, page_count)).strip()
+    
+    def _extract_pages_in_parallel(self, source: Union[Path, BinaryIO], page_count: int) -> List[str]:
+        """Extract the text of every PDF page, splitting the pages across processes."""
+        if isinstance(source, Path):
+            data = source.read_bytes()
+        else:
+            source.seek(0)
+            data = source.read()
+        
+        # Text extraction is pure Python, so threads would wait on the GIL. Spawned
+        # workers avoid forking a process that is serving other threads.
+        workers = min(os.cpu_count() or 1, page_count)
+        step = -(-page_count // workers)
+        jobs = [(data, start, min(start + step, page_count)) for start in range(0, page_count, step)]
+        
+        with ProcessPoolExecutor(
+            max_workers=len(jobs),
+            mp_context=multiprocessing.get_context('spawn')
+        ) as pool:
+            return [text for texts in pool.map(_extract_pdf_pages, jobs) for text in texts]
     
-    def _parse_word(self, path: Path) -> str:
+    def _parse_word(self, source: Union[Path, BinaryIO]) -> str:
         """Parse Word document using python-docx."""
         try:
             from docx import Document
-            doc = Document(path)
+            doc = Document(source)
             text = "\n".join([paragraph.text for paragraph in doc.paragraphs])
             return text.strip()
         except ImportError:
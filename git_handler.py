@@ -5,12 +5,60 @@ Uses GitHub API and MCP server when available.
 
 import os
 import re
+import shutil
 import subprocess
 import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
-from typing import Dict, Optional, List, Tuple
+from typing import Dict, Iterator, Optional, List, Tuple
 import json
 
+try:
+    import requests
+except ImportError:
+    requests = None  # Repositories are then always cloned
+
+
+# Default location of the cloned repositories kept between evaluations
+# (override with REPO_CACHE_DIR, or set it to an empty value to disable)
+DEFAULT_REPO_CACHE_DIR = '~/.cache/llm-teacher/repos'
+
+# One lock per cached clone so concurrent evaluations do not update it together
+_repo_locks = {}
+_repo_locks_guard = threading.Lock()
+
+# Concurrent requests to the GitHub API, shared by all handlers so parallel
+# evaluations stay under the GitHub secondary rate limits
+_API_WORKERS = int(os.getenv('GITHUB_API_CONCURRENCY', 8))
+_api_slots = threading.BoundedSemaphore(_API_WORKERS)
+
+# GitHub API sessions shared by all handlers so connections are reused, by token
+_sessions = {}
+_sessions_guard = threading.Lock()
+
+# Common code file extensions
+_CODE_EXTENSIONS = frozenset({
+    '.py', '.js', '.ts', '.jsx', '.tsx', '.java', '.cpp', '.c', '.h',
+    '.cs', '.go', '.rs', '.rb', '.php', '.swift', '.kt', '.scala',
+    '.html', '.css', '.vue', '.svelte', '.json', '.yaml', '.yml',
+    '.md', '.sh', '.sql', '.r', '.m', '.ml', '.fs'
+})
+
+# Ignore common directories
+_IGNORED_DIRS = frozenset({
+    '.git', '__pycache__', 'node_modules', '.venv', 'venv',
+    'env', '.env', 'dist', 'build', '.idea', '.vscode', 'target'
+})
+
+# Owner and repository of a GitHub URL (HTTPS or SSH, with or without .git or a sub-path)
+_GITHUB_URL_RE = re.compile(r'github\.com[:/]([^/]+)/([^/]+?)(?:\.git)?(?:/.*)?$')
+
+# Characters GitHub allows in owner and repository names; names are also used
+# as cache paths, so '.' and '..' are rejected too
+_GITHUB_NAME_RE = re.compile(r'[A-Za-z0-9_.-]+')
+
 
 class GitHandler:
     """Handle GitHub repository access and code extraction."""
@@ -45,34 +93,42 @@ class GitHandler:
     
     def _parse_github_url(self, url: str) -> Tuple[Optional[str], Optional[str]]:
         """Parse GitHub URL to extract owner and repo name."""
-        patterns = [
-            r'github\.com[:/]([^/]+)/([^/]+?)(?:\.git)?/?$',
-            r'github\.com[:/]([^/]+)/([^/]+?)(?:/.*)?$',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, url)
-            if match:
-                return match.group(1), match.group(2).rstrip('/')
+        match = _GITHUB_URL_RE.search(url)
+        if match:
+            owner, repo = match.group(1), match.group(2).rstrip('/')
+            if all(
+                _GITHUB_NAME_RE.fullmatch(name) and name not in ('.', '..')
+                for name in (owner, repo)
+            ):
+                return owner, repo
         
         return None, None
     
     def _get_repo_via_api(self, owner: str, repo: str) -> Optional[Dict]:
         """Try to get repository info via GitHub API."""
-        if not self.github_token:
+        if not self.github_token or requests is None:
             return None
         
         try:
-            import requests
+            session = self._get_session()
             
-            headers = {
-                'Authorization': f'token {self.github_token}',
-                'Accept': 'application/vnd.github.v3+json'
-            }
+            # An unchanged latest commit answers 304 without a body or a rate-limit
+            # charge, and the files read last time are still current
+            snapshot_path = self._api_snapshot_path(owner, repo)
+            snapshot = self._load_api_snapshot(snapshot_path)
+            headers = {'If-None-Match': snapshot['etag']} if snapshot else {}
+            head_response = self._api_get(
+                session,
+                f'https://api.github.com/repos/{owner}/{repo}/commits/HEAD',
+                headers=headers,
+                timeout=10
+            )
+            if head_response.status_code == 304 and snapshot:
+                return snapshot['repo_info']
             
             # Get repository info
             api_url = f'https://api.github.com/repos/{owner}/{repo}'
-            response = requests.get(api_url, headers=headers, timeout=10)
+            response = self._api_get(session, api_url, timeout=10)
             
             if response.status_code != 200:
                 return None
@@ -81,14 +137,15 @@ class GitHandler:
             
             # Get repository contents (limited to top-level files)
             contents_url = f'https://api.github.com/repos/{owner}/{repo}/contents'
-            contents_response = requests.get(contents_url, headers=headers, timeout=10)
+            contents_response = self._api_get(session, contents_url, timeout=10)
             
             files_info = []
-            if contents_response.status_code == 200:
+            complete = contents_response.status_code == 200
+            if complete:
                 contents = contents_response.json()
-                files_info = self._extract_files_info(contents, owner, repo, headers)
+                files_info, complete = self._extract_files_info(contents, session)
             
-            return {
+            repo_info = {
                 'name': repo_data.get('name', repo),
                 'full_name': repo_data.get('full_name', f'{owner}/{repo}'),
                 'description': repo_data.get('description', ''),
@@ -97,81 +154,173 @@ class GitHandler:
                 'files': files_info,
                 'source': 'api'
             }
+            
+            # A partial read is used once but not reused until the next commit
+            etag = head_response.headers.get('ETag')
+            if complete and head_response.status_code == 200 and etag and snapshot_path:
+                self._save_api_snapshot(snapshot_path, {'etag': etag, 'repo_info': repo_info})
+            return repo_info
         except Exception:
             return None
     
+    def _api_snapshot_path(self, owner: str, repo: str) -> Optional[Path]:
+        """Return the file keeping the files read through the API (None if disabled)."""
+        return self._repo_cache_path(owner.lower(), f'{repo.lower()}.api.json')
+    
+    def _repo_cache_path(self, owner: str, name: str) -> Optional[Path]:
+        """
+        Return the path of a repository in the clone cache.
+        
+        Returns:
+            The path, or None if the cache is disabled or the path would fall
+            outside the cache directory
+        """
+        cache_dir = os.getenv('REPO_CACHE_DIR', DEFAULT_REPO_CACHE_DIR)
+        if not cache_dir:
+            return None
+        root = Path(cache_dir).expanduser().resolve()
+        path = (root / owner / name).resolve()
+        if root not in path.parents:
+            return None
+        return path
+    
+    def _load_api_snapshot(self, path: Optional[Path]) -> Optional[Dict]:
+        """Load the repository read through the API last time, with its commit ETag."""
+        if path is None or not path.exists():
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                snapshot = json.load(file)
+            if snapshot.get('etag') and snapshot.get('repo_info'):
+                return snapshot
+        except (OSError, ValueError):
+            pass
+        return None
+    
+    def _save_api_snapshot(self, path: Path, snapshot: Dict):
+        """Persist a repository read through the API, ignoring failures."""
+        # Write to a temporary file first so readers never see partial JSON
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=str(path.parent), suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as file:
+                json.dump(snapshot, file)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+    
+    def _get_session(self):
+        """Return the shared GitHub API session for the token."""
+        with _sessions_guard:
+            if self.github_token not in _sessions:
+                session = requests.Session()
+                session.headers.update({
+                    'Authorization': f'token {self.github_token}',
+                    'Accept': 'application/vnd.github.v3+json'
+                })
+                session.mount('https://', requests.adapters.HTTPAdapter(pool_maxsize=_API_WORKERS))
+                _sessions[self.github_token] = session
+            return _sessions[self.github_token]
+    
+    def _api_get(self, session, url: str, **kwargs):
+        """Send a GET request to GitHub once one of the shared request slots is free."""
+        with _api_slots:
+            return session.get(url, **kwargs)
+    
     def _extract_files_info(
-        self, 
-        contents: List, 
-        owner: str, 
-        repo: str, 
-        headers: Dict,
+        self,
+        contents: List,
+        session,
         max_files: int = 50
-    ) -> List[Dict]:
-        """Recursively extract file information from repository."""
-        import requests
+    ) -> Tuple[List[Dict], bool]:
+        """
+        Extract file information from repository, fetching files concurrently.
         
-        files_info = []
+        Returns:
+            Tuple of (files, whether every listed directory and file was read)
+        """
+        with ThreadPoolExecutor(max_workers=_API_WORKERS) as pool:
+            items, complete = self._list_code_files(contents, session, pool, max_files)
+            files_info = list(pool.map(lambda item: self._download_file(item, session), items))
+            complete = complete and all(files_info)
+            return [file_info for file_info in files_info if file_info], complete
+    
+    def _list_code_files(
+        self,
+        contents: List,
+        session,
+        pool,
+        max_files: int
+    ) -> Tuple[List[Dict], bool]:
+        """List the code files of a repository, reading each directory level at once."""
+        items = []
+        complete = True
+        level = contents
         
-        for item in contents[:max_files]:
-            if item['type'] == 'file':
-                # Get file content for code files
-                if self._is_code_file(item['name']):
-                    try:
-                        file_response = requests.get(
-                            item['download_url'],
-                            headers=headers,
-                            timeout=5
-                        )
-                        if file_response.status_code == 200:
-                            files_info.append({
-                                'path': item['path'],
-                                'name': item['name'],
-                                'content': file_response.text[:50000],  # Limit size
-                                'size': item['size']
-                            })
-                    except Exception:
-                        pass
-            elif item['type'] == 'dir' and len(files_info) < max_files:
-                # Recursively get directory contents
-                try:
-                    dir_response = requests.get(
-                        item['url'],
-                        headers=headers,
-                        timeout=5
-                    )
-                    if dir_response.status_code == 200:
-                        files_info.extend(
-                            self._extract_files_info(
-                                dir_response.json(),
-                                owner,
-                                repo,
-                                headers,
-                                max_files - len(files_info)
-                            )
-                        )
-                except Exception:
-                    pass
+        while level and len(items) < max_files:
+            dirs = []
+            for item in level:
+                if item['type'] == 'file':
+                    if self._is_code_file(item['name']):
+                        items.append(item)
+                elif item['type'] == 'dir':
+                    dirs.append(item)
+            
+            # Fetch the listings of all directories of the next level together
+            listings = list(pool.map(
+                lambda item: self._list_directory(item, session), dirs[:max_files]
+            ))
+            complete = complete and all(listing is not None for listing in listings)
+            level = [entry for listing in listings if listing for entry in listing]
         
-        return files_info
+        return items[:max_files], complete
+    
+    def _list_directory(self, item: Dict, session) -> Optional[List]:
+        """Fetch the contents of a repository directory (None if the request fails)."""
+        try:
+            dir_response = self._api_get(session, item['url'], timeout=5)
+            if dir_response.status_code == 200:
+                return dir_response.json()
+        except Exception:
+            pass
+        return None
+    
+    def _download_file(self, item: Dict, session) -> Optional[Dict]:
+        """Download the content of a listed file (None if the download fails)."""
+        try:
+            file_response = self._api_get(session, item['download_url'], timeout=5)
+            if file_response.status_code == 200:
+                return {
+                    'path': item['path'],
+                    'name': item['name'],
+                    'content': file_response.text[:50000],  # Limit size
+                    'size': item['size']
+                }
+        except Exception:
+            pass
+        return None
     
     def _get_repo_via_clone(self, git_url: str) -> Optional[Dict]:
         """Clone repository and extract code information."""
         try:
-            # Create temporary directory
-            self.temp_dir = tempfile.mkdtemp(prefix='repo_eval_')
-            repo_path = Path(self.temp_dir) / 'repo'
-            
-            # Clone repository
-            subprocess.run(
-                ['git', 'clone', '--depth', '1', git_url, str(repo_path)],
-                check=True,
-                capture_output=True,
-                timeout=60
-            )
+            owner, repo = self._parse_github_url(git_url)
+            repo_path = self._repo_cache_path(owner, repo) if owner and repo else None
             
-            # Extract code files
-            files_info = self._scan_repository(repo_path)
+            if repo_path is not None:
+                # Reuse the clone of a previous evaluation, updated to the latest commit
+                with self._repo_lock(repo_path):
+                    self._update_clone(git_url, repo_path)
+                    files_info = self._scan_repository(repo_path)
+            else:
+                # Create temporary directory
+                self.temp_dir = tempfile.mkdtemp(prefix='repo_eval_')
+                repo_path = Path(self.temp_dir) / 'repo'
+                
+                # Clone repository
+                self._clone(git_url, repo_path)
+                
+                # Extract code files
+                files_info = self._scan_repository(repo_path)
             
             return {
                 'name': repo_path.name,
@@ -186,61 +335,137 @@ class GitHandler:
         except Exception as e:
             return None
     
+    def _repo_lock(self, repo_path: Path) -> threading.Lock:
+        """Return the lock guarding a cached clone."""
+        with _repo_locks_guard:
+            return _repo_locks.setdefault(str(repo_path), threading.Lock())
+    
+    def _update_clone(self, git_url: str, repo_path: Path):
+        """Bring a cached clone to the latest commit, cloning it if needed."""
+        if (repo_path / '.git').exists():
+            try:
+                for command in (
+                    ['fetch', '--depth', '1', 'origin', 'HEAD'],
+                    ['reset', '--hard', 'FETCH_HEAD']
+                ):
+                    subprocess.run(
+                        ['git', '-C', str(repo_path), *command],
+                        check=True,
+                        capture_output=True,
+                        timeout=60
+                    )
+                return
+            except subprocess.CalledProcessError:
+                # Start over from a fresh clone
+                shutil.rmtree(repo_path, ignore_errors=True)
+        
+        repo_path.parent.mkdir(parents=True, exist_ok=True)
+        self._clone(git_url, repo_path)
+    
+    def _clone(self, git_url: str, repo_path: Path):
+        """
+        Clone the latest commit of a repository, fetching only its code files.
+        
+        A partial clone downloads file contents on demand, and the sparse
+        checkout only asks for files with a code extension outside ignored
+        directories. Falls back to a full shallow clone if git or the server
+        does not support it.
+        """
+        patterns = [f'*{ext}' for ext in sorted(_CODE_EXTENSIONS)]
+        patterns += [f'!**/{ignored}/**' for ignored in sorted(_IGNORED_DIRS)]
+        # A failed clone is only removed if the directory is the clone's own
+        existed = repo_path.exists()
+        try:
+            subprocess.run(
+                ['git', 'clone', '--depth', '1', '--filter=blob:none', '--sparse',
+                 git_url, str(repo_path)],
+                check=True,
+                capture_output=True,
+                timeout=60
+            )
+            subprocess.run(
+                ['git', '-C', str(repo_path), 'sparse-checkout', 'set', '--no-cone', *patterns],
+                check=True,
+                capture_output=True,
+                timeout=60
+            )
+            return
+        except subprocess.CalledProcessError:
+            if not existed:
+                shutil.rmtree(repo_path, ignore_errors=True)
+        
+        subprocess.run(
+            ['git', 'clone', '--depth', '1', git_url, str(repo_path)],
+            check=True,
+            capture_output=True,
+            timeout=60
+        )
+    
     def _scan_repository(self, repo_path: Path, max_files: int = 50) -> List[Dict]:
         """Scan repository for code files."""
         files_info = []
         
-        # Common code file extensions
-        code_extensions = {
-            '.py', '.js', '.ts', '.jsx', '.tsx', '.java', '.cpp', '.c', '.h',
-            '.cs', '.go', '.rs', '.rb', '.php', '.swift', '.kt', '.scala',
-            '.html', '.css', '.vue', '.svelte', '.json', '.yaml', '.yml',
-            '.md', '.sh', '.sql', '.r', '.m', '.ml', '.fs'
-        }
+        candidates = self._walk_code_files(repo_path)
         
-        # Ignore common directories
-        ignore_dirs = {
-            '.git', '__pycache__', 'node_modules', '.venv', 'venv',
-            'env', '.env', 'dist', 'build', '.idea', '.vscode', 'target'
-        }
-        
-        for file_path in repo_path.rglob('*'):
-            if file_path.is_file():
-                # Skip ignored directories
-                if any(ignore in file_path.parts for ignore in ignore_dirs):
-                    continue
-                
-                # Check if it's a code file
-                if file_path.suffix in code_extensions:
-                    try:
-                        content = file_path.read_text(encoding='utf-8', errors='ignore')
-                        # Limit file size
-                        if len(content) > 50000:
-                            content = content[:50000] + "\n... (truncated)"
-                        
-                        files_info.append({
-                            'path': str(file_path.relative_to(repo_path)),
-                            'name': file_path.name,
-                            'content': content,
-                            'size': file_path.stat().st_size
-                        })
-                        
+        # Read the files in parallel, keeping the first max_files readable ones
+        with ThreadPoolExecutor(max_workers=32) as pool:
+            while True:
+                batch = list(islice(candidates, max_files))
+                if not batch:
+                    break
+                for file_info in pool.map(lambda path: self._read_file(path, repo_path), batch):
+                    if file_info:
+                        files_info.append(file_info)
                         if len(files_info) >= max_files:
-                            break
-                    except Exception:
-                        pass
+                            return files_info
         
         return files_info
     
+    def _walk_code_files(self, directory: Path) -> Iterator[Path]:
+        """
+        Yield the code files below a directory in a stable order.
+        
+        Ignored directories are skipped without being read, and the walk stops
+        as soon as the caller has enough files.
+        """
+        try:
+            with os.scandir(directory) as scan:
+                entries = sorted(scan, key=lambda entry: entry.name)
+        except OSError:
+            return
+        
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in _IGNORED_DIRS:
+                        yield from self._walk_code_files(Path(entry.path))
+                elif self._is_code_file(entry.name) and entry.is_file():
+                    yield Path(entry.path)
+            except OSError:
+                continue
+    
+    def _read_file(self, file_path: Path, repo_path: Path) -> Optional[Dict]:
+        """Read a code file of a cloned repository (None if it cannot be read)."""
+        try:
+            size = file_path.stat().st_size
+            content = file_path.read_text(encoding='utf-8', errors='ignore')
+        except Exception:
+            return None
+        
+        # Limit file size
+        if len(content) > 50000:
+            content = content[:50000] + "\n... (truncated)"
+        
+        return {
+            'path': str(file_path.relative_to(repo_path)),
+            'name': file_path.name,
+            'content': content,
+            'size': size
+        }
+    
     def _is_code_file(self, filename: str) -> bool:
         """Check if file is a code file."""
-        code_extensions = {
-            '.py', '.js', '.ts', '.jsx', '.tsx', '.java', '.cpp', '.c', '.h',
-            '.cs', '.go', '.rs', '.rb', '.php', '.swift', '.kt', '.scala',
-            '.html', '.css', '.vue', '.svelte', '.json', '.yaml', '.yml',
-            '.md', '.sh', '.sql', '.r', '.m', '.ml', '.fs'
-        }
-        return any(filename.endswith(ext) for ext in code_extensions)
+        return os.path.splitext(filename)[1] in _CODE_EXTENSIONS
     
     def _detect_language(self, files_info: List[Dict]) -> str:
         """Detect primary programming language from files."""
@@ -268,8 +493,7 @@ class GitHandler:
         return lang_map.get(most_common_ext, most_common_ext[1:].upper() if most_common_ext else 'Unknown')
     
     def cleanup(self):
-        """Clean up temporary directories."""
+        """Clean up temporary directories (cached clones are kept)."""
         if self.temp_dir and Path(self.temp_dir).exists():
-            import shutil
             shutil.rmtree(self.temp_dir, ignore_errors=True)
 
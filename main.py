@@ -5,26 +5,54 @@ Evaluates student GitHub projects against project descriptions.
 """
 
 import argparse
+import asyncio
+import functools
+import json
+import logging
+import os
+import re
 import sys
-from pathlib import Path
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
-from evaluator import ProjectEvaluator
-from file_parser import FileParser
-from git_handler import GitHandler
+# The evaluation modules pull in the OpenAI, HTTP and document libraries, so they
+# are imported once the arguments are valid: --help and usage errors stay instant
+if TYPE_CHECKING:
+    from evaluator import ProjectEvaluator
+
+# Progress of the evaluations, written to stderr so stdout only holds the results
+logger = logging.getLogger("llm-teacher")
+
+
+class _JsonFormatter(logging.Formatter):
+    """Format progress records as one JSON object per line."""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'message': record.getMessage()
+        }
+        entry.update(getattr(record, 'fields', {}))
+        if record.exc_info:
+            entry['error'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
 
 
 def main():
     parser = argparse.ArgumentParser(
-        description="Evaluate a GitHub project against a project description using LLM"
+        description="Evaluate a GitHub project against a project description using LLM",
+        fromfile_prefix_chars="@"
     )
     parser.add_argument(
         "git_url",
         type=str,
-        help="URL of the GitHub repository to evaluate"
+        nargs="+",
+        help="URL of the GitHub repositories to evaluate (or @file listing one per line)"
     )
     parser.add_argument(
         "description_file",
@@ -37,78 +65,309 @@ def main():
         default=None,
         help="Output file path for the evaluation report (optional)"
     )
+    parser.add_argument(
+        "--output-dir",
+        type=str,
+        default=None,
+        help="Directory receiving one evaluation report per repository (optional)"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=8,
+        help="Number of repositories fetched and evaluated at the same time (default: 8)"
+    )
     parser.add_argument(
         "--api-key",
         type=str,
         default=None,
         help="OpenAI API key (or set OPENAI_API_KEY environment variable)"
     )
+    parser.add_argument(
+        "--tier",
+        choices=["accurate", "fast"],
+        default="accurate",
+        help="Model tier: accurate (gpt-4o) or fast (gpt-4o-mini, cheaper)"
+    )
+    parser.add_argument(
+        "--max-output-tokens",
+        type=int,
+        default=4000,
+        help="Maximum number of tokens of the evaluation response (default: 4000)"
+    )
+    parser.add_argument(
+        "--no-stream",
+        action="store_true",
+        help="Print the evaluation only once it is complete"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Call the LLM even if the same evaluation is cached"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=None,
+        help="Directory of the evaluation cache (default: LLM_CACHE_DIR or ~/.cache/llm-teacher)"
+    )
+    parser.add_argument(
+        "--semantic-threshold",
+        type=float,
+        default=None,
+        help="Reuse the cached evaluation of the same code against a description "
+             "at least this similar (cosine similarity, e.g. 0.97)"
+    )
+    parser.add_argument(
+        "--log-format",
+        choices=["text", "json"],
+        default="text",
+        help="Format of the progress messages written to stderr (default: text)"
+    )
+    parser.add_argument(
+        "--debug",
+        action="store_true",
+        help="Show the traceback of errors"
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only send the files changed since the last full evaluation when most are unchanged"
+    )
     
     args = parser.parse_args()
+    if args.output and len(args.git_url) > 1:
+        parser.error("--output takes a single repository; use --output-dir")
+    
+    _configure_logging(args.log_format)
+    return asyncio.run(_evaluate(args))
+
+
+def _configure_logging(log_format: str):
+    """Send progress messages to stderr, as text or JSON lines."""
+    handler = logging.StreamHandler(sys.stderr)
+    if log_format == "json":
+        handler.setFormatter(_JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s", "%H:%M:%S"))
+    logger.handlers[:] = [handler]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+
+async def _run_in_thread(func, *args):
+    """Run a blocking function in a worker thread without blocking the event loop."""
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(None, functools.partial(func, *args))
+
+
+async def _evaluate(args: argparse.Namespace) -> int:
+    """Evaluate the repositories and print the reports for the parsed arguments."""
+    from evaluator import ProjectEvaluator
     
     try:
-        # Parse the project description
-        print("📄 Parsing project description...")
-        parser_obj = FileParser()
-        description = parser_obj.parse(args.description_file)
+        evaluator = ProjectEvaluator(
+            api_key=args.api_key,
+            cache=not args.no_cache,
+            tier=args.tier,
+            max_output_tokens=args.max_output_tokens,
+            cache_dir=args.cache_dir,
+            semantic_threshold=args.semantic_threshold,
+            incremental=args.incremental
+        )
+        
+        # Parse the project description once, while the repositories are fetched
+        logger.info("📄 Parsing project description...")
+        description_job = asyncio.ensure_future(_parse_description(args.description_file))
+        semaphore = asyncio.Semaphore(max(args.concurrency, 1))
+        cleanups = []
+        try:
+            results = await asyncio.gather(*[
+                _evaluate_repository(
+                    args, evaluator, git_url, description_job, semaphore, cleanups
+                )
+                for git_url in args.git_url
+            ])
+        finally:
+            # Temporary clones are removed while the reports are written and the
+            # other repositories evaluated, but always before exiting
+            await asyncio.gather(*cleanups)
         
-        if not description:
-            print("❌ Error: Could not parse project description file.")
-            sys.exit(1)
+        if not description_job.result():
+            logger.error("❌ Error: Could not parse project description file.")
+            return 1
         
-        print(f"✅ Project description parsed ({len(description)} characters)")
+        if len(results) > 1:
+            lines = ["", "="*60, "📊 EVALUATION SUMMARY", "="*60]
+            lines.extend(
+                f"{result['score']:>3}/100  {git_url}" if result else f"  error  {git_url}"
+                for git_url, result in zip(args.git_url, results)
+            )
+            print("\n".join(lines))
+        return 0 if all(results) else 1
+        
+    except Exception as e:
+        logger.error(f"❌ Error: {str(e)}", exc_info=args.debug)
+        return 1
+
+
+async def _parse_description(description_file: str) -> str:
+    """Parse the project description in a worker thread."""
+    from file_parser import FileParser
+    
+    start = time.monotonic()
+    description = await _run_in_thread(FileParser().parse, description_file)
+    if description:
+        logger.info(
+            f"✅ Project description parsed ({len(description)} characters)",
+            extra={'fields': {'phase': 'parse', 'dur_ms': _elapsed_ms(start)}}
+        )
+    return description
+
+
+async def _evaluate_repository(
+    args: argparse.Namespace,
+    evaluator: "ProjectEvaluator",
+    git_url: str,
+    description_job: asyncio.Future,
+    semaphore: asyncio.Semaphore,
+    cleanups: List[asyncio.Future]
+) -> Optional[Dict]:
+    """
+    Fetch and evaluate one repository, printing and saving its report.
+    
+    Returns:
+        The evaluation, or None if the repository could not be evaluated
+    """
+    from git_handler import GitHandler
+    
+    async with semaphore:
+        # Nothing is fetched once the description is known to be unusable
+        if description_job.done() and (
+            description_job.cancelled()
+            or description_job.exception() is not None
+            or not description_job.result()
+        ):
+            return None
         
-        # Handle git repository
-        print("🔍 Accessing GitHub repository...")
+        logger.info(f"🔍 Accessing GitHub repository {git_url}...")
+        start = time.monotonic()
         git_handler = GitHandler()
         try:
-            repo_info = git_handler.get_repository_info(args.git_url)
+            # Wait for both jobs even if one fails, so nothing outlives the cleanup
+            repo_info, description = await asyncio.gather(
+                _run_in_thread(git_handler.get_repository_info, git_url),
+                description_job,
+                return_exceptions=True
+            )
+            # A description that cannot be parsed is reported once, by the caller
+            if isinstance(description, BaseException) or not description:
+                return None
+            if isinstance(repo_info, BaseException):
+                raise repo_info
             
             if not repo_info:
-                print("❌ Error: Could not access GitHub repository.")
-                return 1
+                logger.error(
+                    f"❌ Error: Could not access GitHub repository {git_url}.",
+                    extra={'fields': {'phase': 'fetch', 'repo': git_url}}
+                )
+                return None
             
-            print(f"✅ Repository accessed: {repo_info.get('name', 'Unknown')}")
+            logger.info(
+                f"✅ Repository accessed: {repo_info.get('name', 'Unknown')}",
+                extra={'fields': {
+                    'phase': 'fetch',
+                    'repo': git_url,
+                    'files': len(repo_info.get('files', [])),
+                    'dur_ms': _elapsed_ms(start)
+                }}
+            )
             
             # Evaluate the project
-            print("🤖 Evaluating project with LLM...")
-            evaluator = ProjectEvaluator(
-                api_key=args.api_key
+            logger.info(f"🤖 Evaluating {git_url} with LLM...")
+            start = time.monotonic()
+            if len(args.git_url) == 1 and not args.no_stream:
+                result = await _stream_evaluation(evaluator, repo_info, description)
+            else:
+                result = await evaluator.aevaluate(repo_info, description)
+            logger.info(
+                f"✅ Evaluated {git_url}",
+                extra={'fields': {
+                    'phase': 'evaluate',
+                    'repo': git_url,
+                    'score': result['score'],
+                    'dur_ms': _elapsed_ms(start)
+                }}
             )
-            
-            result = evaluator.evaluate(repo_info, description)
-            
-            # Display results
-            print("\n" + "="*60)
-            print("📊 EVALUATION RESULTS")
-            print("="*60)
-            print(f"\n🎯 Score: {result['score']}/100")
-            print(f"\n📝 Explanation:\n{result['explanation']}")
-            print("\n" + "="*60)
-            
-            # Save to file if requested
-            if args.output:
-                output_path = Path(args.output)
-                with open(output_path, 'w', encoding='utf-8') as f:
-                    f.write("EVALUATION REPORT\n")
-                    f.write("="*60 + "\n\n")
-                    f.write(f"Repository: {args.git_url}\n")
-                    f.write(f"Description File: {args.description_file}\n")
-                    f.write(f"Score: {result['score']}/100\n\n")
-                    f.write("Explanation:\n")
-                    f.write(result['explanation'])
-                print(f"\n💾 Report saved to: {output_path}")
-            
-            return 0
+        except Exception as e:
+            logger.error(
+                f"❌ Error ({git_url}): {str(e)}",
+                exc_info=args.debug,
+                extra={'fields': {'repo': git_url}}
+            )
+            return None
         finally:
-            # Clean up temporary directories
-            git_handler.cleanup()
-        
-    except Exception as e:
-        print(f"❌ Error: {str(e)}", file=sys.stderr)
-        import traceback
-        traceback.print_exc()
-        return 1
+            # Clean up temporary directories in a worker thread, with cleanups
+            # collecting the pending removals
+            cleanups.append(asyncio.ensure_future(_run_in_thread(git_handler.cleanup)))
+    
+    # Display results; several repositories are summarized once all are evaluated
+    if len(args.git_url) == 1:
+        print(
+            f"\n{'='*60}\n📊 EVALUATION RESULTS\n{'='*60}\n"
+            f"\n🎯 Score: {result['score']}/100\n"
+            f"\n📝 Explanation:\n{result['explanation']}\n"
+            f"\n{'='*60}"
+        )
+    
+    # Save to file if requested
+    output_path = args.output
+    if not output_path and args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+        output_path = os.path.join(args.output_dir, f"{_report_name(git_url)}.txt")
+    if output_path:
+        report = (
+            f"EVALUATION REPORT\n"
+            f"{'='*60}\n\n"
+            f"Repository: {git_url}\n"
+            f"Description File: {args.description_file}\n"
+            f"Score: {result['score']}/100\n\n"
+            f"Explanation:\n"
+            f"{result['explanation']}"
+        )
+        with open(output_path, 'wb') as f:
+            f.write(report.encode('utf-8'))
+        logger.info(f"💾 Report saved to: {output_path}")
+    
+    return result
+
+
+async def _stream_evaluation(
+    evaluator: "ProjectEvaluator",
+    repo_info: Dict,
+    description: str
+) -> Dict:
+    """Evaluate a repository, printing the LLM response as it is generated."""
+    printed = 0
+    result = None
+    async for response, result in evaluator.aevaluate_stream(repo_info, description):
+        sys.stdout.write(response[printed:])
+        sys.stdout.flush()
+        printed = len(response)
+    if printed:
+        print()
+    return result
+
+
+def _elapsed_ms(start: float) -> int:
+    """Milliseconds elapsed since a time.monotonic() value."""
+    return int((time.monotonic() - start) * 1000)
+
+
+def _report_name(git_url: str) -> str:
+    """Name the report of a repository after its owner and name."""
+    path = re.sub(r"(\.git)?/*$", "", git_url.split("github.com", 1)[-1])
+    return re.sub(r"[^\w.-]+", "_", path).strip("_") or "report"
 
 
 if __name__ == "__main__":
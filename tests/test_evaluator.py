@@ -0,0 +1,240 @@
+"""
+Tests for the response cache of the evaluator.
+"""
+
+import asyncio
+import json
+import types
+
+import pytest
+
+import evaluator
+from evaluator import ProjectEvaluator, _strip_python_comments
+
+
+REPO_INFO = {
+    'name': 'repo',
+    'url': 'https://github.com/owner/repo',
+    'language': 'Python',
+    'files': [{'path': 'main.py', 'content': 'print(1)\n'}]
+}
+DESCRIPTION = 'Build a program that prints a number to stdout.'
+
+
+class FakeCompletions:
+    """Answer every chat completion with the same content."""
+    
+    def __init__(self, content):
+        self.content = content
+        self.calls = 0
+        self.prompt = None
+    
+    async def create(self, **kwargs):
+        self.calls += 1
+        self.prompt = kwargs['messages'][-1]['content']
+        message = types.SimpleNamespace(content=self.content)
+        return types.SimpleNamespace(
+            choices=[types.SimpleNamespace(message=message, finish_reason='stop')]
+        )
+
+
+@pytest.fixture
+def completions(monkeypatch):
+    completions = FakeCompletions(json.dumps({'score': 'N/A', 'explanation': 'Unknown'}))
+    client = types.SimpleNamespace(chat=types.SimpleNamespace(completions=completions))
+    monkeypatch.setattr(ProjectEvaluator, '_get_async_client', lambda self: client)
+    return completions
+
+
+def test_unreadable_response_is_not_cached(completions, tmp_path):
+    evaluator = ProjectEvaluator(api_key='key', model='gpt-3.5-turbo', cache_dir=str(tmp_path))
+    
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            asyncio.run(evaluator.aevaluate(REPO_INFO, DESCRIPTION))
+    assert completions.calls == 2
+    assert not any(path.is_file() for path in tmp_path.rglob('*'))
+    
+    completions.content = json.dumps({'score': 80, 'explanation': 'Done'})
+    assert asyncio.run(evaluator.aevaluate(REPO_INFO, DESCRIPTION))['score'] == 80
+    assert asyncio.run(evaluator.aevaluate(REPO_INFO, DESCRIPTION))['score'] == 80
+    assert completions.calls == 3
+
+
+def test_incremental_evaluation_skips_files_never_evaluated(completions, tmp_path):
+    completions.content = json.dumps({'score': 80, 'explanation': 'Done'})
+    evaluator = ProjectEvaluator(
+        api_key='key', model='gpt-4o-mini', cache_dir=str(tmp_path), incremental=True
+    )
+    files = [{'path': f'module{index}.py', 'content': f'print({index})\n'} for index in range(10)]
+    lock = {'path': 'package-lock.json', 'content': '{}'}
+    asyncio.run(evaluator.aevaluate(dict(REPO_INFO, files=files + [lock]), DESCRIPTION))
+    
+    changed = files[:9] + [{'path': 'module9.py', 'content': 'print(99)\n'}]
+    lock = {'path': 'package-lock.json', 'content': '{"lockfileVersion": 3}'}
+    empty = {'path': 'empty.py', 'content': ''}
+    asyncio.run(evaluator.aevaluate(dict(REPO_INFO, files=changed + [lock, empty]), DESCRIPTION))
+    assert 'PREVIOUS EVALUATION' in completions.prompt
+    assert 'module9.py' in completions.prompt
+    assert 'package-lock.json' not in completions.prompt
+    assert 'empty.py' not in completions.prompt
+
+
+@pytest.mark.parametrize('model, temperature', [
+    ('gpt-4o', 0.2),
+    ('o1', None),
+    ('o3-mini', None),
+    ('o4-mini', None),
+])
+def test_reasoning_models_keep_the_default_temperature(model, temperature):
+    request = ProjectEvaluator(api_key='key', model=model)._chat_request('Evaluate this.')
+    assert request.get('temperature') == temperature
+
+
+@pytest.mark.parametrize('content, stripped', [
+    ("x = 1  # one\n# comment\ny = 2\n", "x = 1  \n\ny = 2\n"),
+    ("s = '\u2028'\n# comment\n", "s = '\u2028'\n\n"),
+    ("a = '\x0c\x1c'  # note\r\nb = 2\r\n", "a = '\x0c\x1c'  \r\nb = 2\r\n"),
+])
+def test_strip_python_comments(content, stripped):
+    assert _strip_python_comments(content) == stripped
+
+
+class FakeBatchClient:
+    """Accept batch submissions and complete them with one response per request."""
+    
+    def __init__(self, content):
+        self.requests = []
+        self.files = types.SimpleNamespace(create=self._create_file, content=self._file_content)
+        self.batches = types.SimpleNamespace(create=self._create_batch, retrieve=self._retrieve)
+        self.content = content
+    
+    def _create_file(self, file, purpose):
+        self.requests = [json.loads(line) for line in file[1].decode('utf-8').splitlines()]
+        return types.SimpleNamespace(id='file_1')
+    
+    def _create_batch(self, **kwargs):
+        return types.SimpleNamespace(id='batch_1')
+    
+    def _retrieve(self, batch_id):
+        counts = types.SimpleNamespace(completed=len(self.requests), total=len(self.requests))
+        return types.SimpleNamespace(status='completed', request_counts=counts, output_file_id='out_1')
+    
+    def _file_content(self, file_id):
+        records = [
+            {'custom_id': request['custom_id'], 'response': {'status_code': 200, 'body': {
+                'choices': [{'finish_reason': 'stop', 'message': {'content': self.content}}]
+            }}}
+            for request in self.requests
+        ]
+        return types.SimpleNamespace(text="\n".join(json.dumps(record) for record in records))
+
+
+def test_batch_jobs_without_llm_are_not_sent(monkeypatch, tmp_path):
+    client = FakeBatchClient(json.dumps({'score': 70, 'explanation': 'Done'}))
+    monkeypatch.setattr(ProjectEvaluator, '_get_client', lambda self: client)
+    evaluator = ProjectEvaluator(api_key='key', model='gpt-4o-mini', cache_dir=str(tmp_path))
+    empty = dict(REPO_INFO, url='https://github.com/owner/empty', files=[
+        {'path': 'package-lock.json', 'content': '{}'},
+        {'path': 'dist/app.min.js', 'content': 'var a=1;'}
+    ])
+    
+    batch_id = evaluator.submit_batch([
+        (REPO_INFO, DESCRIPTION), (empty, DESCRIPTION), (REPO_INFO, 'Too short')
+    ])
+    assert len(client.requests) == 1
+    
+    results = evaluator.poll_batch(batch_id)['results']
+    assert [result.get('score') for result in results] == [70, 0, None]
+    assert 'too short' in results[2]['error']
+
+
+def test_batch_without_llm_jobs_completes_locally(monkeypatch, tmp_path):
+    client = FakeBatchClient('')
+    client.batches.retrieve = None
+    monkeypatch.setattr(ProjectEvaluator, '_get_client', lambda self: client)
+    evaluator = ProjectEvaluator(api_key='key', model='gpt-4o-mini', cache_dir=str(tmp_path))
+    empty = dict(REPO_INFO, files=[])
+    
+    status = evaluator.poll_batch(evaluator.submit_batch([(empty, DESCRIPTION)]))
+    assert status['status'] == 'completed'
+    assert status['results'] == [
+        {'label': REPO_INFO['url'], 'score': 0, 'explanation': 'No code files found in the repository.'}
+    ]
+
+
+class FakeOpenAI:
+    """OpenAI client recording whether it was closed."""
+    
+    def __init__(self, api_key, **kwargs):
+        self.api_key = api_key
+        self.closed = False
+        self.chat = types.SimpleNamespace(completions=self)
+    
+    def is_closed(self):
+        return self.closed
+    
+    def close(self):
+        self.closed = True
+
+
+class FakeAsyncOpenAI(FakeOpenAI):
+    """Asynchronous client whose first request lets other keys evict it."""
+    
+    on_create = None
+    
+    async def close(self):
+        self.closed = True
+    
+    async def create(self, **kwargs):
+        if FakeAsyncOpenAI.on_create is not None:
+            on_create, FakeAsyncOpenAI.on_create = FakeAsyncOpenAI.on_create, None
+            on_create()
+            raise ConnectionError('connection closed')
+        message = types.SimpleNamespace(content=json.dumps({'score': 90, 'explanation': 'Done'}))
+        return types.SimpleNamespace(
+            choices=[types.SimpleNamespace(message=message, finish_reason='stop')]
+        )
+
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    monkeypatch.setattr(evaluator, 'OpenAI', FakeOpenAI)
+    monkeypatch.setattr(evaluator, 'AsyncOpenAI', FakeAsyncOpenAI)
+    monkeypatch.setattr(evaluator, 'httpx', types.SimpleNamespace(
+        Client=lambda **kwargs: None, AsyncClient=lambda **kwargs: None
+    ), raising=False)
+    monkeypatch.setattr(evaluator, '_HTTP_LIMITS', None, raising=False)
+    monkeypatch.setattr(evaluator, '_RETRYABLE_ERRORS', (ConnectionError,))
+    monkeypatch.setattr(evaluator, '_LLM_BACKOFF_MIN', 0)
+    monkeypatch.setattr(evaluator, '_LLM_BACKOFF_MAX', 0)
+    monkeypatch.setattr(evaluator, '_clients', evaluator.OrderedDict())
+
+
+def test_client_cache_closes_evicted_clients(fake_openai):
+    clients = [
+        ProjectEvaluator(api_key=f'key{index}')._get_client()
+        for index in range(evaluator._CLIENT_CACHE_SIZE + 1)
+    ]
+    assert clients[0].closed
+    assert not any(client.closed for client in clients[1:])
+    assert list(evaluator._clients) == [client.api_key for client in clients[1:]]
+
+
+def test_request_retries_with_a_new_client_once_evicted(fake_openai):
+    user = ProjectEvaluator(api_key='user', model='gpt-4o-mini', cache=False)
+    
+    def other_visitors():
+        for index in range(evaluator._CLIENT_CACHE_SIZE):
+            ProjectEvaluator(api_key=f'visitor{index}')._get_async_client()
+    
+    async def evaluate():
+        FakeAsyncOpenAI.on_create = other_visitors
+        first = user._get_async_client()
+        result = await user.aevaluate(REPO_INFO, DESCRIPTION)
+        await asyncio.sleep(0)
+        return first, result
+    
+    first, result = asyncio.run(evaluate())
+    assert first.closed
+    assert result['score'] == 90
@@ -0,0 +1,108 @@
+"""
+Tests for the repository caches of the git handler.
+"""
+
+import shutil
+import subprocess
+import types
+
+import pytest
+
+import git_handler
+from git_handler import GitHandler
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    """A clone cache nested in a directory holding a file that must survive."""
+    (tmp_path / 'keep.txt').write_text('keep')
+    cache_dir = tmp_path / 'cache' / 'a' / 'b'
+    cache_dir.mkdir(parents=True)
+    monkeypatch.setenv('REPO_CACHE_DIR', str(cache_dir))
+    monkeypatch.delenv('GITHUB_TOKEN', raising=False)
+    return cache_dir
+
+
+@pytest.mark.parametrize('url', [
+    'https://github.com/../..',
+    'https://github.com/foo/..',
+    'https://github.com/./repo',
+    'https://github.com/foo/re$po',
+])
+def test_rejects_names_escaping_the_cache(cache, tmp_path, url):
+    with pytest.raises(ValueError):
+        GitHandler().get_repository_info(url)
+    assert (tmp_path / 'keep.txt').exists()
+    assert cache.exists()
+
+
+def test_accepts_github_names():
+    assert GitHandler()._parse_github_url('https://github.com/my-org/repo.name_2.git') == (
+        'my-org', 'repo.name_2'
+    )
+
+
+def test_cache_paths_stay_under_the_cache(cache):
+    handler = GitHandler()
+    assert handler._repo_cache_path('..', '..') is None
+    assert handler._repo_cache_path('owner', '..') is None
+    assert handler._api_snapshot_path('..', '..x') is None
+    assert handler._repo_cache_path('owner', 'repo') == cache.resolve() / 'owner' / 'repo'
+
+
+@pytest.mark.skipif(shutil.which('git') is None, reason='git is not installed')
+def test_failed_clone_keeps_existing_directory(tmp_path):
+    existing = tmp_path / 'existing'
+    existing.mkdir()
+    (existing / 'data.txt').write_text('data')
+    
+    with pytest.raises(subprocess.CalledProcessError):
+        GitHandler()._clone(str(tmp_path / 'missing-remote'), existing)
+    assert (existing / 'data.txt').exists()
+
+
+class FakeSession:
+    """Answer GitHub API requests for a repository with two files."""
+    
+    def __init__(self, failing_url=None):
+        self.failing_url = failing_url
+        self.responses = {
+            'https://api.github.com/repos/owner/repo/commits/HEAD': (200, None),
+            'https://api.github.com/repos/owner/repo': (200, {'name': 'repo', 'language': 'Python'}),
+            'https://api.github.com/repos/owner/repo/contents': (200, [
+                {'type': 'file', 'name': name, 'path': name, 'size': 10,
+                 'download_url': f'https://raw.example/{name}'}
+                for name in ('main.py', 'utils.py')
+            ]),
+            'https://raw.example/main.py': (200, 'print(1)'),
+            'https://raw.example/utils.py': (200, 'x = 1'),
+        }
+    
+    def get(self, url, headers=None, **kwargs):
+        status, body = self.responses[url]
+        if url == self.failing_url:
+            status = 403
+        elif headers and headers.get('If-None-Match'):
+            status = 304
+        return types.SimpleNamespace(
+            status_code=status,
+            headers={'ETag': '"head"'},
+            json=lambda: body,
+            text=body if isinstance(body, str) else ''
+        )
+
+
+@pytest.mark.parametrize('failing_url, files, saved', [
+    (None, ['main.py', 'utils.py'], True),
+    ('https://raw.example/utils.py', ['main.py'], False),
+])
+def test_only_complete_api_reads_are_saved(cache, monkeypatch, failing_url, files, saved):
+    session = FakeSession(failing_url)
+    monkeypatch.setattr(git_handler, 'requests', object())
+    monkeypatch.setattr(GitHandler, '_get_session', lambda self: session)
+    handler = GitHandler()
+    handler.github_token = 'token'
+    
+    repo_info = handler._get_repo_via_api('owner', 'repo')
+    assert [file_info['path'] for file_info in repo_info['files']] == files
+    assert handler._api_snapshot_path('owner', 'repo').exists() == saved